@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Alertmanager configuration dir watchdog process.
+
+Watches given directory and its subdirectories using Linux's `inotify` and fires the
+`alertmanager_config_file_changed` Juju event whenever the Alertmanager's configuration changes.
+It's started in the background by `AlertmanagerConfigDirWatcher` and only depends on the standard
+library, so that it doesn't have to import any of the charm's dependencies.
+"""
+
+import ctypes
+import logging
+import os
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# When the config dir is a mounted ConfigMap, the config files are symlinks into the `..data` dir,
+# which is itself a symlink atomically swapped by the kubelet on every update.
+CONFIGMAP_DATA_DIR_NAME = "..data"
+# Besides hidden files, editors' swap, backup and temp files never hold the config or templates
+IGNORED_FILE_NAME_SUFFIXES = ("~", ".swp", ".swx", ".tmp", ".bak")
+DISPATCH_DEBOUNCE_SECONDS = 0.25
+DISPATCH_TIMEOUT_SECONDS = 30
+
+# inotify constants, as defined in <sys/inotify.h>
+IN_CLOEXEC = os.O_CLOEXEC
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INOTIFY_WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_MOVE_SELF | IN_DELETE_SELF
+)
+# Events indicating that the content of the config file might have changed
+CONTENT_CHANGE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# Header of `struct inotify_event`: wd, mask, cookie, len. It's followed by `len` bytes of the
+# NUL-padded file name.
+INOTIFY_EVENT_HEADER = struct.Struct("iIII")
+INOTIFY_READ_BUFFER_SIZE = 4096
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+def dispatch(run_cmd: str, unit: str, charm_dir: str):
+    """Fires alert_rules_changed Juju event."""
+    dispatch_sub_cmd = "JUJU_DISPATCH_PATH=hooks/alertmanager_config_file_changed {}/dispatch"
+    try:
+        # Hook's output isn't needed, errors still go to the watchdog's log
+        subprocess.run(
+            [run_cmd, "-u", unit, dispatch_sub_cmd.format(charm_dir)],
+            stdout=subprocess.DEVNULL,
+            timeout=DISPATCH_TIMEOUT_SECONDS,
+        )
+    except subprocess.TimeoutExpired:
+        logger.error("Dispatching alertmanager_config_file_changed event timed out.")
+
+
+def is_watched_file(name: str) -> bool:
+    """Checks whether changes to given file in the watched directory may change the config.
+
+    Args:
+        name: Name of the file in the watched directory
+
+    Returns:
+        bool: True if the file may hold the Alertmanager config or templates, else False
+    """
+    if name == CONFIGMAP_DATA_DIR_NAME:
+        return True
+    return not name.startswith(".") and not name.endswith(IGNORED_FILE_NAME_SUFFIXES)
+
+
+class Handler:
+    """Handler for inotify events from the watched directory.
+
+    Events are only handled by scheduling the dispatch of the Juju event. Dispatching is done by
+    a background thread, launched with `start`.
+    """
+
+    def __init__(
+        self,
+        run_cmd: str,
+        unit: str,
+        charm_dir: str,
+        debounce_seconds: float = DISPATCH_DEBOUNCE_SECONDS,
+    ):
+        self.run_cmd = run_cmd
+        self.unit = unit
+        self.charm_dir = charm_dir
+        self.debounce_seconds = debounce_seconds
+        self._pending_dispatch: "queue.Queue[None]" = queue.Queue(maxsize=1)
+
+    def start(self):
+        """Starts the background thread dispatching the Juju event whenever one is pending."""
+        threading.Thread(target=self._dispatch_worker, daemon=True).start()
+
+    def handle(self, mask: int, name: str):
+        """Handles a single inotify event.
+
+        Only events indicating that the config content might have changed are taken into
+        account: writes (IN_CLOSE_WRITE), atomic saves, where the new content is written to a temp
+        file which then replaces the target file (IN_MOVED_TO), and creation of symlinks
+        (IN_CREATE). They're handled for any file in the watched directory, as besides the
+        Alertmanager config file it holds the templates the config refers to. Besides these, the
+        ConfigMap's `..data` symlink is watched, so that ConfigMap updates, which never touch the
+        files' symlinks themselves, are caught too. Events concerning hidden files (swap files,
+        ConfigMap's timestamped dirs etc.) and editors' backup and temp files are ignored.
+
+        If the kernel's event queue overflowed (IN_Q_OVERFLOW), events got lost, so anything might
+        have changed and the Juju event is dispatched.
+
+        Args:
+            mask: inotify event mask
+            name: Name of the file in the watched directory the event concerns
+        """
+        if mask & IN_Q_OVERFLOW:
+            logger.warning("inotify event queue overflowed, some events were lost.")
+            self._schedule_dispatch()
+        elif mask & CONTENT_CHANGE_MASK and is_watched_file(name):
+            self._schedule_dispatch()
+
+    def _schedule_dispatch(self):
+        """Schedules dispatching of the Juju event.
+
+        At most one dispatch is pending at any time. Requests made while one is already pending
+        are merged into it.
+        """
+        try:
+            self._pending_dispatch.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def dispatch_pending(self, block: bool = True) -> bool:
+        """Dispatches the Juju event if a dispatch is pending.
+
+        A single save usually produces a burst of events, so the dispatch is delayed by
+        `debounce_seconds` and requests made in the meantime are drained, resulting in a single
+        Juju hook execution per burst.
+
+        Args:
+            block: Whether to wait for a dispatch to be scheduled if none is pending
+
+        Returns:
+            bool: True if the Juju event was dispatched, else False
+        """
+        try:
+            self._pending_dispatch.get(block=block)
+        except queue.Empty:
+            return False
+        time.sleep(self.debounce_seconds)
+        try:
+            self._pending_dispatch.get_nowait()
+        except queue.Empty:
+            pass
+        dispatch(self.run_cmd, self.unit, self.charm_dir)
+        return True
+
+    def _dispatch_worker(self):
+        """Dispatches the Juju event whenever a dispatch is pending."""
+        while True:
+            self.dispatch_pending()
+
+
+def inotify_init() -> int:
+    """Creates an inotify instance.
+
+    Returns:
+        int: inotify file descriptor
+    """
+    fd = _libc.inotify_init1(IN_CLOEXEC)
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return fd
+
+
+def inotify_add_watch(fd: int, path: str, mask: int = INOTIFY_WATCH_MASK) -> int:
+    """Adds a watch for given path to given inotify instance.
+
+    Args:
+        fd: inotify file descriptor
+        path: Path to watch
+        mask: inotify events to watch for
+
+    Returns:
+        int: Watch descriptor
+    """
+    wd = _libc.inotify_add_watch(fd, os.fsencode(path), mask)
+    if wd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno), path)
+    return wd
+
+
+def watch_directory_tree(fd: int, path: str, watches: Dict[int, str]) -> int:
+    """Watches given directory and all its non-hidden subdirectories.
+
+    inotify isn't recursive, so every subdirectory needs a watch of its own. Hidden ones, like the
+    ConfigMap's `..data` and timestamped dirs, are skipped, as their files are reached through the
+    top directory's symlinks.
+
+    Args:
+        fd: inotify file descriptor
+        path: Directory to watch
+        watches: Watched directories by watch descriptor, updated in place
+
+    Returns:
+        int: Watch descriptor of given directory
+    """
+    top_wd = inotify_add_watch(fd, path)
+    watches[top_wd] = path
+    for directory, subdirectories, _ in os.walk(path):
+        subdirectories[:] = [name for name in subdirectories if not name.startswith(".")]
+        for name in subdirectories:
+            subdirectory = os.path.join(directory, name)
+            try:
+                watches[inotify_add_watch(fd, subdirectory)] = subdirectory
+            except OSError as e:
+                logger.warning("Couldn't watch %s: %s", subdirectory, e)
+    return top_wd
+
+
+def read_inotify_events(fd: int) -> Iterator[Tuple[int, int, str]]:
+    """Yields events read from given inotify file descriptor.
+
+    Blocks until events are available. A single read returns all the queued events.
+
+    Args:
+        fd: inotify file descriptor
+
+    Yields:
+        tuple: Watch descriptor, event mask and name of the file the event concerns
+    """
+    while True:
+        buffer = os.read(fd, INOTIFY_READ_BUFFER_SIZE)
+        if not buffer:
+            return
+        events = memoryview(buffer)
+        offset = 0
+        while offset < len(events):
+            wd, mask, _, name_length = INOTIFY_EVENT_HEADER.unpack_from(events, offset)
+            name_start = offset + INOTIFY_EVENT_HEADER.size
+            offset = name_start + name_length
+            name = bytes(events[name_start:offset]).rstrip(b"\0")
+            yield wd, mask, os.fsdecode(name)
+
+
+def main():
+    """Starts watchdog."""
+    config_dir, run_cmd, unit, charm_dir = sys.argv[1:]
+
+    event_handler = Handler(run_cmd, unit, charm_dir)
+    event_handler.start()
+    try:
+        fd = inotify_init()
+        watches: Dict[int, str] = {}
+        config_dir_wd = watch_directory_tree(fd, config_dir, watches)
+        for wd, mask, name in read_inotify_events(fd):
+            if wd == config_dir_wd and mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                logger.error("Watched directory %s is gone! Watchdog stopped!", config_dir)
+                return
+            if mask & IN_IGNORED:
+                watches.pop(wd, None)
+                continue
+            if mask & IN_Q_OVERFLOW:
+                # Subdirectories created while events were being dropped still need watches
+                watch_directory_tree(fd, config_dir, watches)
+            elif mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and wd in watches:
+                if not name.startswith("."):
+                    watch_directory_tree(fd, os.path.join(watches[wd], name), watches)
+            event_handler.handle(mask, name)
+    except Exception:
+        logger.error("Watchdog error! Watchdog stopped!")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,14 @@
 
 """Alertmanager Configurer Operator Charm."""
 
+import functools
+import hashlib
+import json
 import logging
+import mmap
 import os
-from typing import Union
+from types import MappingProxyType
+from typing import Iterable, Optional, Set, Union
 
 import yaml
 from charms.alertmanager_k8s.v0.alertmanager_remote_configuration import (
@@ -17,13 +22,21 @@ from charms.observability_libs.v1.kubernetes_service_patch import (
     KubernetesServicePatch,
     ServicePort,
 )
-from ops.charm import CharmBase, PebbleReadyEvent, RelationJoinedEvent
+from ops.charm import (
+    CharmBase,
+    ConfigChangedEvent,
+    PebbleReadyEvent,
+    RelationJoinedEvent,
+)
+from ops.framework import StoredState
 from ops.main import main
 from ops.model import (
     ActiveStatus,
     BlockedStatus,
+    Container,
     MaintenanceStatus,
     ModelError,
+    UnknownStatus,
     WaitingStatus,
 )
 from ops.pebble import ConnectionError, Layer
@@ -34,40 +47,245 @@ from config_dir_watcher import (
     AlertmanagerConfigFileChangedEvent,
 )
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
+TEMPLATES_FILE_MMAP_THRESHOLD = 64 * 1024
+
+# Compact and deterministic JSON encoding, suitable both for hashing and for storing
+_encode = json.JSONEncoder(separators=(",", ":"), sort_keys=True).encode
+
+
+def _load_config_file(path: str) -> dict:
+    """Reads given Alertmanager configuration file and turns it into a dictionary.
+
+    Mirrors `RemoteConfigurationProvider.load_config_file`, but parses the file using libyaml
+    (if available), which is an order of magnitude faster than the pure-Python loader.
+
+    Args:
+        path: Path to the Alertmanager configuration file
+
+    Returns:
+        dict: Alertmanager configuration file in a form of a dictionary
+
+    Raises:
+        ConfigReadError: if a problem with reading given config file happens
+    """
+    try:
+        with open(path, "r") as config_yaml:
+            return yaml.load(config_yaml, Loader=SafeLoader)
+    except (FileNotFoundError, OSError, yaml.YAMLError) as e:
+        raise ConfigReadError(path) from e
+
+
+def _read_config_cache(cache_path: str, path: str, digest: str) -> Optional[dict]:
+    """Reads Alertmanager config from the JSON cache file.
+
+    The cache is only considered valid if it was created from the same version (path and
+    content digest) of the Alertmanager configuration file.
+
+    Args:
+        cache_path: Path to the JSON cache file
+        path: Path to the Alertmanager configuration file
+        digest: Digest of the Alertmanager configuration file's content
+
+    Returns:
+        dict: Alertmanager configuration or None if cache is missing or stale
+    """
+    try:
+        with open(cache_path, "r") as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict):
+        return None
+    if cache.get("path") != path or cache.get("digest") != digest:
+        return None
+    return cache.get("config")
+
+
+def _write_config_cache(cache_path: str, path: str, digest: str, config: dict) -> None:
+    """Atomically writes Alertmanager config to the JSON cache file.
+
+    Failing to write the cache is not fatal, as the config can always be parsed from YAML.
+
+    Args:
+        cache_path: Path to the JSON cache file
+        path: Path to the Alertmanager configuration file
+        digest: Digest of the Alertmanager configuration file's content
+        config: Alertmanager configuration
+    """
+    tmp_cache_path = f"{cache_path}.tmp"
+    try:
+        with open(tmp_cache_path, "w") as cache_file:
+            cache_file.write(_encode({"path": path, "digest": digest, "config": config}))
+        os.replace(tmp_cache_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug("Failed to write Alertmanager config cache: %s", e)
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_config_cached(path: str, digest: str, cache_path: str) -> dict:
+    """Cached version of `_load_config_file`.
+
+    `digest` of the file's content is used as a part of the cache key, so that the cache entry
+    gets invalidated as soon as the content changes, even if the file's modification time
+    doesn't. As every Juju hook runs in a new process, parsed config is also persisted to a JSON
+    file, which is much faster to load than YAML.
+
+    Args:
+        path: Path to the Alertmanager configuration file
+        digest: Digest of the Alertmanager configuration file's content
+        cache_path: Path to the JSON cache file
+
+    Returns:
+        dict: Alertmanager configuration file in a form of a dictionary
+    """
+    config = _read_config_cache(cache_path, path, digest)
+    if config is None:
+        config = _load_config_file(path)
+        _write_config_cache(cache_path, path, digest, config)
+    return config
+
+
+def _config_file_digest(path: str) -> str:
+    """Computes a digest of given Alertmanager configuration file's content.
+
+    Args:
+        path: Path to the Alertmanager configuration file
+
+    Returns:
+        str: hex digest of the file's content
+
+    Raises:
+        ConfigReadError: if given config file can't be read
+    """
+    try:
+        with open(path, "rb") as config_file:
+            return hashlib.blake2b(config_file.read()).hexdigest()
+    except OSError as e:
+        raise ConfigReadError(path) from e
+
+
+def _config_hash(config: Optional[dict]) -> str:
+    """Computes a stable hash of given Alertmanager config and the templates it refers to.
+
+    Args:
+        config: Alertmanager configuration
+
+    Returns:
+        str: hex digest of the config
+    """
+    config_hash = hashlib.blake2b(_encode(config).encode(), digest_size=16)
+    if config and config.get("templates") is not None:
+        _update_hash_with_templates(config_hash, config["templates"])
+    return config_hash.hexdigest()
+
+
+def _existing_files(paths: Iterable[str]) -> Set[str]:
+    """Lists which of given files exist, scanning each of their parent directories only once.
+
+    Args:
+        paths: File paths
+
+    Returns:
+        set: Normalized paths of the files which exist
+    """
+    existing_files: Set[str] = set()
+    for directory in {os.path.dirname(os.path.normpath(path)) for path in paths}:
+        try:
+            with os.scandir(directory or ".") as entries:
+                existing_files.update(
+                    os.path.join(directory, entry.name) for entry in entries if entry.is_file()
+                )
+        except OSError:
+            continue
+    return existing_files
+
+
+def _update_hash_with_templates(config_hash, templates_files: list) -> None:
+    """Updates given hash with the content of given Alertmanager templates files.
+
+    Files which don't exist are skipped, the same way `RemoteConfigurationProvider` skips them.
+    Large files are memory mapped rather than read, to avoid copying them. Each file's content is
+    prefixed with its length, so that content moving from one file to the next changes the hash.
+
+    Args:
+        config_hash: hashlib hash object
+        templates_files: Alertmanager templates files paths
+    """
+    existing_files = _existing_files(templates_files)
+    for templates_file in templates_files:
+        templates_file = os.path.normpath(templates_file)
+        if templates_file not in existing_files:
+            continue
+        try:
+            with open(templates_file, "rb") as templates:
+                if os.fstat(templates.fileno()).st_size > TEMPLATES_FILE_MMAP_THRESHOLD:
+                    with mmap.mmap(templates.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                        _update_hash_with_content(config_hash, content)
+                else:
+                    _update_hash_with_content(config_hash, templates.read())
+        except OSError:
+            continue
+
+
+def _update_hash_with_content(content_hash, content) -> None:
+    """Updates given hash with given content, prefixed with its length.
+
+    Args:
+        content_hash: hashlib hash object
+        content: bytes-like content
+    """
+    content_hash.update(len(content).to_bytes(8, "little"))
+    content_hash.update(content)
+
+
+def _layer_hash(layer: Layer) -> str:
+    """Computes a stable hash of given Pebble layer.
+
+    Args:
+        layer: Pebble layer
+
+    Returns:
+        str: hex digest of the layer
+    """
+    return hashlib.blake2b(_encode(layer.to_dict()).encode()).hexdigest()
+
 
 class AlertmanagerConfigurerOperatorCharm(CharmBase):
     """Alertmanager Configurer Operator Charm."""
 
     ALERTMANAGER_CONFIG_DIR = "/etc/alertmanager/"
     ALERTMANAGER_CONFIG_FILE = os.path.join(ALERTMANAGER_CONFIG_DIR, "alertmanager.yml")
+    ALERTMANAGER_CONFIG_CACHE_FILE = "/var/lib/juju/alertmanager-configurer-config.json"
     DUMMY_HTTP_SERVER_SERVICE_NAME = "dummy-http-server"
     DUMMY_HTTP_SERVER_HOST = "localhost"
     DUMMY_HTTP_SERVER_PORT = 80
     ALERTMANAGER_CONFIGURER_SERVICE_NAME = "alertmanager-configurer"
     ALERTMANAGER_CONFIGURER_PORT = 9101
-    with open(
-        os.path.join(os.path.dirname(os.path.realpath(__file__)), "alertmanager.yml"),
-        "r",
-    ) as default_yaml:
-        ALERTMANAGER_DEFAULT_CONFIG = default_yaml.read()
+    ALERTMANAGER_CONFIGURER_PORT_STR = str(ALERTMANAGER_CONFIGURER_PORT)
+    ALERTMANAGER_DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(__file__), "alertmanager.yml")
+    # Read-only, as it's shared by all the charm instances
+    ALERTMANAGER_DEFAULT_CONFIG_PARSED = MappingProxyType(
+        _load_config_file(ALERTMANAGER_DEFAULT_CONFIG_FILE)
+    )
 
     on = AlertmanagerConfigFileChangedCharmEvents()
+    _stored = StoredState()
 
     def __init__(self, *args):
         super().__init__(*args)
-        self._alertmanager_configurer_container_name = (
-            self._alertmanager_configurer_layer_name
-        ) = self._alertmanager_configurer_service_name = self.ALERTMANAGER_CONFIGURER_SERVICE_NAME
-        self._dummy_http_server_container_name = (
-            self._dummy_http_server_layer_name
-        ) = self._dummy_http_server_service_name = self.DUMMY_HTTP_SERVER_SERVICE_NAME
-        self._alertmanager_configurer_container = self.unit.get_container(
-            self._alertmanager_configurer_container_name
-        )
-        self._dummy_http_server_container = self.unit.get_container(
-            self._dummy_http_server_container_name
+        # Set by `_on_configuration_broken`, which the provider emits synchronously
+        self._configuration_broken = False
+        self._stored.set_default(
+            multitenant_label=self.model.config.get("multitenant_label"),
+            last_config_hash="",
+            configurer_layer_hash="",
         )
 
         self.service_patch = KubernetesServicePatch(
@@ -77,16 +295,19 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
                 ServicePort(name="dummy-http-server", port=self.DUMMY_HTTP_SERVER_PORT),
             ],
         )
-        self.remote_configuration_provider = RemoteConfigurationProvider(
-            charm=self,
-            alertmanager_config=yaml.safe_load(self.ALERTMANAGER_DEFAULT_CONFIG),
-            relation_name="alertmanager",
-        )
+        if self.model.relations["alertmanager"]:
+            # Relation events need the provider to be observing them
+            _ = self.remote_configuration_provider
 
         self.framework.observe(self.on.start, self._on_start)
+        self.framework.observe(self.on.config_changed, self._on_config_changed)
+        self.framework.observe(self.on.leader_elected, self._reset_pushed_config_hash)
+        self.framework.observe(
+            self.on.alertmanager_relation_joined, self._reset_pushed_config_hash
+        )
         self.framework.observe(
             self.on.alertmanager_configurer_pebble_ready,
-            self._start_alertmanager_configurer,
+            self._on_alertmanager_configurer_pebble_ready,
         )
         self.framework.observe(
             self.on.dummy_http_server_pebble_ready, self._on_dummy_http_server_pebble_ready
@@ -98,10 +319,6 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
         self.framework.observe(
             self.on.alertmanager_config_file_changed, self._on_alertmanager_config_changed
         )
-        self.framework.observe(
-            self.remote_configuration_provider.on.configuration_broken,
-            self._on_configuration_broken,
-        )
 
     def _on_start(self, event) -> None:
         """Event handler for the start event.
@@ -119,6 +336,31 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
         watchdog = AlertmanagerConfigDirWatcher(self, self.ALERTMANAGER_CONFIG_DIR)
         watchdog.start_watchdog()
 
+    def _on_config_changed(self, _: ConfigChangedEvent) -> None:
+        """Event handler for the config-changed event.
+
+        Invalidates cached Alertmanager Configurer's command and Pebble layer
+        if `multitenant_label` changed.
+        """
+        multitenant_label = self.model.config.get("multitenant_label")
+        if multitenant_label == self._stored.multitenant_label:
+            return
+        self._stored.multitenant_label = multitenant_label
+        self.__dict__.pop("_alertmanager_configurer_command", None)
+        self.__dict__.pop("_alertmanager_configurer_layer", None)
+
+    def _on_alertmanager_configurer_pebble_ready(self, event: PebbleReadyEvent) -> None:
+        """Event handler for alertmanager-configurer pebble ready event.
+
+        Pebble ready means that the workload container has (re)started with an empty plan,
+        so the hash of the previously applied layer is forgotten before starting the service.
+
+        Args:
+            event: Juju PebbleReadyEvent event
+        """
+        self._stored.configurer_layer_hash = ""
+        self._start_alertmanager_configurer(event)
+
     def _start_alertmanager_configurer(
         self, event: Union[AlertmanagerConfigFileChangedEvent, PebbleReadyEvent]
     ) -> None:
@@ -136,7 +378,7 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
             return
         if not self._alertmanager_configurer_container.can_connect():
             self.unit.status = WaitingStatus(
-                f"Waiting for {self._alertmanager_configurer_container_name} container to be ready"
+                f"Waiting for {self.ALERTMANAGER_CONFIGURER_SERVICE_NAME} container to be ready"
             )
             event.defer()
             return
@@ -160,18 +402,38 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
             self._start_dummy_http_server()
         else:
             self.unit.status = WaitingStatus(
-                f"Waiting for {self._dummy_http_server_container_name} container to be ready"
+                f"Waiting for {self.DUMMY_HTTP_SERVER_SERVICE_NAME} container to be ready"
             )
             event.defer()
 
     def _on_alertmanager_config_changed(self, event: AlertmanagerConfigFileChangedEvent) -> None:
-        """Updates relation data bag with updated Alertmanager config."""
+        """Updates relation data bag with updated Alertmanager config.
+
+        A single save of the config file may fire multiple events. If the config (including the
+        templates) is the same as the one pushed most recently, the event is ignored. Parsing
+        the unchanged file again is cheap, as parsed configs are cached by content digest.
+
+        Without the alertmanager relation there's nobody to push the config to, so the event is
+        deferred without reading the file.
+        """
+        if not self.model.get_relation("alertmanager"):
+            self.unit.status = BlockedStatus("Waiting for alertmanager relation to be created")
+            event.defer()
+            return
         try:
-            alertmanager_config = RemoteConfigurationProvider.load_config_file(
-                self.ALERTMANAGER_CONFIG_FILE
+            alertmanager_config = _parse_config_cached(
+                self.ALERTMANAGER_CONFIG_FILE,
+                _config_file_digest(self.ALERTMANAGER_CONFIG_FILE),
+                self.ALERTMANAGER_CONFIG_CACHE_FILE,
             )
+            config_hash = _config_hash(alertmanager_config)
+            if config_hash == self._stored.last_config_hash:
+                logger.debug("Alertmanager config unchanged. Ignoring event.")
+                return
             self._start_alertmanager_configurer(event)
-            self.remote_configuration_provider.update_relation_data_bag(alertmanager_config)
+            pushed = self._update_relation_data_bag(alertmanager_config)
+            if pushed and not event.deferred:
+                self._stored.last_config_hash = config_hash
         except ConfigReadError:
             logger.error("Error reading Alertmanager config file.")
             self.model.unit.status = BlockedStatus("Error reading Alertmanager config file")
@@ -181,63 +443,138 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
 
         Puts the charm in `Blocked` status to indicate that the provided config is invalid.
         """
+        self._configuration_broken = True
+        self._reset_pushed_config_hash()
         self.model.unit.status = BlockedStatus("Invalid Alertmanager configuration")
 
+    def _reset_pushed_config_hash(self, _=None) -> None:
+        """Forgets the hash of the config pushed to the relation data bag most recently.
+
+        Used whenever relation data bag content may have been changed by something else than
+        `_on_alertmanager_config_changed`.
+        """
+        self._stored.last_config_hash = ""
+
+    def _update_relation_data_bag(self, alertmanager_config: dict) -> bool:
+        """Updates relation data bag with given Alertmanager config.
+
+        Args:
+            alertmanager_config: Alertmanager configuration dictionary.
+
+        Returns:
+            bool: True if the config was pushed to the relation data bag, False if the unit
+                isn't the leader or the config turned out to be invalid.
+        """
+        if not self.unit.is_leader():
+            return False
+        self._configuration_broken = False
+        # Copied for the same reason as the default config in `remote_configuration_provider`
+        self.remote_configuration_provider.update_relation_data_bag(dict(alertmanager_config))
+        return not self._configuration_broken
+
     def _start_alertmanager_configurer_service(self) -> None:
-        """Starts Alertmanager Configurer service."""
-        plan = self._alertmanager_configurer_container.get_plan()
+        """Starts Alertmanager Configurer service.
+
+        Hash of the most recently applied layer is kept in the stored state, which allows
+        skipping the Pebble calls altogether when the layer hasn't changed.
+        """
         layer = self._alertmanager_configurer_layer
-        if plan.services != layer.services:
-            self.unit.status = MaintenanceStatus(
-                f"Configuring pebble layer for {self._alertmanager_configurer_service_name}"
-            )
-            self._alertmanager_configurer_container.add_layer(
-                self._alertmanager_configurer_container_name, layer, combine=True
-            )
-            self._alertmanager_configurer_container.restart(
-                self._alertmanager_configurer_container_name
-            )
-            logger.info(f"Restarted container {self._alertmanager_configurer_service_name}")
+        layer_hash = _layer_hash(layer)
+        if layer_hash == self._stored.configurer_layer_hash:
+            return
+        self.unit.status = MaintenanceStatus(
+            f"Configuring pebble layer for {self.ALERTMANAGER_CONFIGURER_SERVICE_NAME}"
+        )
+        self._alertmanager_configurer_container.add_layer(
+            self.ALERTMANAGER_CONFIGURER_SERVICE_NAME, layer, combine=True
+        )
+        # Pebble restarts the service only if its configuration has changed
+        self._alertmanager_configurer_container.replan()
+        self._stored.configurer_layer_hash = layer_hash
+        logger.info(f"Replanned container {self.ALERTMANAGER_CONFIGURER_SERVICE_NAME}")
 
     def _start_dummy_http_server(self) -> None:
-        """Starts dummy HTTP server service."""
-        plan = self._dummy_http_server_container.get_plan()
-        layer = self._dummy_http_server_layer
-        if plan.services != layer.services:
-            self.unit.status = MaintenanceStatus(
-                f"Configuring pebble layer for {self._dummy_http_server_service_name}"
-            )
-            self._dummy_http_server_container.add_layer(
-                self._dummy_http_server_container_name, layer, combine=True
-            )
-            self._dummy_http_server_container.restart(self._dummy_http_server_service_name)
-            logger.info(f"Restarted container {self._dummy_http_server_service_name}")
+        """Starts dummy HTTP server service.
+
+        The layer is applied without comparing it with the current plan first, as replanning
+        an unchanged layer leaves the running service alone. The unit's status from before is
+        restored afterwards, so that a pebble ready of an already configured container doesn't
+        leave the unit in `Maintenance`.
+        """
+        previous_status = self.unit.status
+        self.unit.status = MaintenanceStatus(
+            f"Configuring pebble layer for {self.DUMMY_HTTP_SERVER_SERVICE_NAME}"
+        )
+        self._dummy_http_server_container.add_layer(
+            self.DUMMY_HTTP_SERVER_SERVICE_NAME, self._dummy_http_server_layer, combine=True
+        )
+        # Starts the service if it's not running, restarts it only if its configuration changed
+        self._dummy_http_server_container.replan()
+        self.__dict__.pop("_dummy_http_server_running", None)
+        logger.info(f"Replanned container {self.DUMMY_HTTP_SERVER_SERVICE_NAME}")
+        if not isinstance(previous_status, UnknownStatus):
+            self.unit.status = previous_status
 
     def _push_default_config_to_workload(self) -> None:
         """Pushes default Alertmanager config file to the workload container."""
-        self._alertmanager_configurer_container.push(
-            self.ALERTMANAGER_CONFIG_FILE, self._default_config
-        )
+        with open(self.ALERTMANAGER_DEFAULT_CONFIG_FILE, "rb") as default_config:
+            self._alertmanager_configurer_container.push(
+                self.ALERTMANAGER_CONFIG_FILE, default_config
+            )
 
     def _on_alertmanager_configurer_relation_joined(self, event: RelationJoinedEvent) -> None:
-        """Handles actions taken when Alertmanager Configurer relation joins."""
+        """Event handler for Alertmanager Configurer relation joined event.
+
+        Adds information about Alertmanager Configurer service name and port to relation data
+        bag.
+        """
         if not self.unit.is_leader():
             return
-        self._add_service_info_to_relation_data_bag(event)
+        relation_data = event.relation.data[self.app]
+        relation_data["service_name"] = self.app.name
+        relation_data["port"] = self.ALERTMANAGER_CONFIGURER_PORT_STR
 
-    def _add_service_info_to_relation_data_bag(self, event: RelationJoinedEvent) -> None:
-        """Event handler for Alertmanager relation joined event.
+    @functools.cached_property
+    def remote_configuration_provider(self) -> RemoteConfigurationProvider:
+        """Handles the `alertmanager` relation.
 
-        Adds information about Alertmanager Configurer service name and port to relation data
-        bag.
+        Created on first use rather than in `__init__`, so that hooks unrelated to the
+        `alertmanager` relation don't pay for it.
+
+        Returns:
+            RemoteConfigurationProvider: provider side of the `alertmanager` relation
         """
-        alertmanager_configurer_relation = event.relation
-        alertmanager_configurer_relation.data[self.app]["service_name"] = self.app.name
-        alertmanager_configurer_relation.data[self.app]["port"] = str(
-            self.ALERTMANAGER_CONFIGURER_PORT
+        remote_configuration_provider = RemoteConfigurationProvider(
+            charm=self,
+            # Shallow copies of configs are given to the provider, as it pops `templates` from them
+            alertmanager_config=dict(self.ALERTMANAGER_DEFAULT_CONFIG_PARSED),
+            relation_name="alertmanager",
+        )
+        self.framework.observe(
+            remote_configuration_provider.on.configuration_broken,
+            self._on_configuration_broken,
         )
+        return remote_configuration_provider
 
-    @property
+    @functools.cached_property
+    def _alertmanager_configurer_container(self) -> Container:
+        """Returns Alertmanager Configurer's workload container.
+
+        Returns:
+            Container: alertmanager-configurer container
+        """
+        return self.unit.get_container(self.ALERTMANAGER_CONFIGURER_SERVICE_NAME)
+
+    @functools.cached_property
+    def _dummy_http_server_container(self) -> Container:
+        """Returns dummy HTTP server's workload container.
+
+        Returns:
+            Container: dummy-http-server container
+        """
+        return self.unit.get_container(self.DUMMY_HTTP_SERVER_SERVICE_NAME)
+
+    @functools.cached_property
     def _alertmanager_configurer_layer(self) -> Layer:
         """Constructs the pebble layer for Alertmanager configurer.
 
@@ -249,22 +586,33 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
                 "summary": "Alertmanager Configurer layer",
                 "description": "Pebble config layer for Alertmanager Configurer",
                 "services": {
-                    self._alertmanager_configurer_service_name: {
+                    self.ALERTMANAGER_CONFIGURER_SERVICE_NAME: {
                         "override": "replace",
                         "startup": "enabled",
-                        "command": f"alertmanager_configurer "
-                        f"-port={str(self.ALERTMANAGER_CONFIGURER_PORT)} "
-                        f"-alertmanager-conf={self.ALERTMANAGER_CONFIG_FILE} "
-                        "-alertmanagerURL="
-                        f"{self.DUMMY_HTTP_SERVER_HOST}:{self.DUMMY_HTTP_SERVER_PORT} "
-                        f'-multitenant-label={self.model.config.get("multitenant_label")} '
-                        "-delete-route-with-receiver=true ",
+                        "command": self._alertmanager_configurer_command,
                     }
                 },
             }
         )
 
-    @property
+    @functools.cached_property
+    def _alertmanager_configurer_command(self) -> str:
+        """Formats the command starting Alertmanager configurer.
+
+        Returns:
+            str: Alertmanager configurer command
+        """
+        return (
+            f"alertmanager_configurer "
+            f"-port={str(self.ALERTMANAGER_CONFIGURER_PORT)} "
+            f"-alertmanager-conf={self.ALERTMANAGER_CONFIG_FILE} "
+            "-alertmanagerURL="
+            f"{self.DUMMY_HTTP_SERVER_HOST}:{self.DUMMY_HTTP_SERVER_PORT} "
+            f'-multitenant-label={self.model.config.get("multitenant_label")} '
+            "-delete-route-with-receiver=true "
+        )
+
+    @functools.cached_property
     def _dummy_http_server_layer(self) -> Layer:
         """Constructs the pebble layer for the dummy HTTP server.
 
@@ -276,7 +624,7 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
                 "summary": "Dummy HTTP server pebble layer",
                 "description": "Pebble layer configuration for the dummy HTTP server",
                 "services": {
-                    self._dummy_http_server_service_name: {
+                    self.DUMMY_HTTP_SERVER_SERVICE_NAME: {
                         "override": "replace",
                         "startup": "enabled",
                         "command": "nginx",
@@ -285,28 +633,22 @@ class AlertmanagerConfigurerOperatorCharm(CharmBase):
             }
         )
 
-    @property
+    @functools.cached_property
     def _dummy_http_server_running(self) -> bool:
         """Checks the dummy HTTP server is running or not.
 
+        The result is cached for the lifetime of the charm instance, i.e. a single hook. It's
+        invalidated when the dummy HTTP server gets (re)started.
+
         Returns:
             bool: True/False.
         """
         try:
-            self._dummy_http_server_container.get_service(self._dummy_http_server_service_name)
+            self._dummy_http_server_container.get_service(self.DUMMY_HTTP_SERVER_SERVICE_NAME)
             return True
         except (ConnectionError, ModelError):
             return False
 
-    @property
-    def _default_config(self) -> str:
-        """Provides default alertmanager.yml content in case it's not passed from the Alertmanager.
-
-        Returns:
-            str: default Alertmanager config
-        """
-        return self.ALERTMANAGER_DEFAULT_CONFIG
-
 
 if __name__ == "__main__":
     main(AlertmanagerConfigurerOperatorCharm)
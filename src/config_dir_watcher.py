@@ -5,7 +5,8 @@
 """Alertmanager configuration dir watcher module.
 
 This module implements custom Juju event (alertmanager_config_changed) fired upon any change
-in a given directory mounted to the workload container. It is based on `watchdog`.
+in a given directory mounted to the workload container. The directory is watched by a background
+process (see `_watchdog_child.py`), based on Linux's `inotify`.
 In this particular case, it is used by the alertmanager-configurer-k8s-operator charm to detect
 changes of the Alertmanager's configuration. Thanks to this mechanism, Alertmanager Configurer
 knows when to update the configuration of the Alertmanager.
@@ -13,15 +14,9 @@ knows when to update the configuration of the Alertmanager.
 
 import logging
 import os
-import subprocess
-import sys
-import time
-from pathlib import Path
 
 from ops.charm import CharmBase, CharmEvents
 from ops.framework import EventBase, EventSource, Object
-from watchdog.events import FileSystemEventHandler
-from watchdog.observers import Observer
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +36,14 @@ class AlertmanagerConfigFileChangedCharmEvents(CharmEvents):
 LOG_FILE_PATH = "/var/log/alertmanager-configurer-watchdog.log"
 
 
+def _juju_bin() -> str:
+    """Returns the path of the binary running commands in the unit's hook context.
+
+    juju-run got renamed to juju-exec in Juju 3.
+    """
+    return "/usr/bin/juju-exec" if os.path.exists("/usr/bin/juju-exec") else "/usr/bin/juju-run"
+
+
 class AlertmanagerConfigDirWatcher(Object):
     """Alertmanager Config Dir Watcher."""
 
@@ -59,60 +62,29 @@ class AlertmanagerConfigDirWatcher(Object):
         if "JUJU_CONTEXT_ID" in new_env:
             new_env.pop("JUJU_CONTEXT_ID")
 
-        juju_bin = (
-            "/usr/bin/juju-exec" if Path("/usr/bin/juju-exec").exists() else "/usr/bin/juju-run"
-        )
-        pid = subprocess.Popen(
-            args=[
+        # posix_spawn doesn't copy the address space of the (potentially big) charm process
+        # the way fork does
+        pid = os.posix_spawn(
+            "/usr/bin/python3",
+            [
                 "/usr/bin/python3",
-                "src/config_dir_watcher.py",
+                "src/_watchdog_child.py",
                 self._config_dir,
-                juju_bin,
+                _juju_bin(),
                 self._charm.unit.name,
-                self._charm.charm_dir,
+                str(self._charm.charm_dir),
+            ],
+            new_env,
+            file_actions=[
+                (
+                    os.POSIX_SPAWN_OPEN,
+                    1,
+                    LOG_FILE_PATH,
+                    os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                    0o644,
+                ),
+                (os.POSIX_SPAWN_DUP2, 1, 2),
             ],
-            stdout=open(LOG_FILE_PATH, "a"),
-            stderr=subprocess.STDOUT,
-            env=new_env,
-        ).pid
+        )
 
         logger.info(f"Started Alertmanager's config watchdog process with PID {pid}.")
-
-
-def dispatch(run_cmd: str, unit: str, charm_dir: str):
-    """Fires alert_rules_changed Juju event."""
-    dispatch_sub_cmd = "JUJU_DISPATCH_PATH=hooks/alertmanager_config_file_changed {}/dispatch"
-    subprocess.run([run_cmd, "-u", unit, dispatch_sub_cmd.format(charm_dir)])
-
-
-class Handler(FileSystemEventHandler):
-    """Handler for changes in the watched directory."""
-
-    def __init__(self, run_cmd: str, unit: str, charm_dir: str):
-        self.run_cmd = run_cmd
-        self.unit = unit
-        self.charm_dir = charm_dir
-
-    def on_closed(self, event):
-        """Watchdog's callback ran on any change in the watched directory."""
-        dispatch(self.run_cmd, self.unit, self.charm_dir)
-
-
-def main():
-    """Starts watchdog."""
-    config_dir, run_cmd, unit, charm_dir = sys.argv[1:]
-
-    observer = Observer()
-    event_handler = Handler(run_cmd, unit, charm_dir)
-    observer.schedule(event_handler, config_dir, recursive=True)
-    observer.start()
-    try:
-        while True:
-            time.sleep(5)
-    except Exception:
-        observer.stop()
-        logger.error("Watchdog error! Watchdog stopped!")
-
-
-if __name__ == "__main__":
-    main()
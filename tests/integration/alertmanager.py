@@ -2,7 +2,7 @@
 # Copyright 2022 Canonical Ltd.
 # See LICENSE file for licensing details.
 
-import requests
+import httpx
 
 
 class Alertmanager:
@@ -14,6 +14,11 @@ class Alertmanager:
             port: Optional; port on which Alertmanager service is exposed.
         """
         self.base_url = f"http://{host}:{port}"
+        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=5.0)
+
+    async def aclose(self) -> None:
+        """Closes the underlying HTTP connection pool."""
+        await self._client.aclose()
 
     async def is_ready(self) -> bool:
         """Send a GET request to check readiness.
@@ -21,10 +26,8 @@ class Alertmanager:
         Returns:
           True if Alertmanager is ready (returned 200 OK); False otherwise.
         """
-        url = f"{self.base_url}/-/ready"
-
-        async with requests.get(url) as response:
-            return response.status_code == 200
+        response = await self._client.get("/-/ready")
+        return response.status_code == 200
 
     async def config(self) -> str:
         """Send a GET request to get Alertmanager configuration.
@@ -32,7 +35,6 @@ class Alertmanager:
         Returns:
           str: YAML config in string format or empty string
         """
-        url = f"{self.base_url}/api/v2/status"
         # Response looks like this:
         # {
         #   "cluster": {
@@ -52,7 +54,7 @@ class Alertmanager:
         #     "version": "0.23.0"
         #   }
         # }
-        response = requests.get(url)
-        response.raise_for_status()
-        result = response.json()
-        return result["config"]["original"]
+        response = await self._client.get("/api/v2/status")
+        if response.status_code != 200:
+            return ""
+        return response.json()["config"]["original"]
@@ -3,117 +3,159 @@
 # See LICENSE file for licensing details.
 
 
+import asyncio
+import json
 import logging
+import time
 from copy import deepcopy
 from pathlib import Path
-from typing import cast
+from typing import Any, Awaitable, Callable, Dict, Tuple, cast
 
+import httpx
 import pytest
-import requests
 import yaml
 from alertmanager import Alertmanager
 from deepdiff import DeepDiff
 from pytest_operator.plugin import OpsTest  # type: ignore[import]  # noqa: F401
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
-METADATA = yaml.safe_load(Path("./metadata.yaml").read_text())
+METADATA = yaml.load(Path("./metadata.yaml").read_text(), Loader=SafeLoader)
 ALERTMANAGER_CONFIGURER_APP_NAME = METADATA["name"]
-ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG = yaml.safe_load(Path("./src/alertmanager.yml").read_text())
+ALERTMANAGER_CONFIGURER_IMAGE = METADATA["resources"][f"{ALERTMANAGER_CONFIGURER_APP_NAME}-image"][
+    "upstream-source"
+]
+DUMMY_HTTP_SERVER_IMAGE = METADATA["resources"]["dummy-http-server-image"]["upstream-source"]
+# Kept serialized, as loading JSON is a much cheaper way to get a fresh copy than deepcopy()
+ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG_JSON = json.dumps(
+    yaml.load(Path("./src/alertmanager.yml").read_text(), Loader=SafeLoader)
+)
 ALERTMANAGER_APP_NAME = "alertmanager-k8s"
 WAIT_FOR_STATUS_TIMEOUT = 5 * 60
 DUMMY_HTTP_SERVER_PORT = 80
 TEST_TENANT = "test-tenant"
 TEST_RECEIVER_NAME = "example"
+POLL_INTERVAL = 0.5
+MODEL_STATUS_CACHE_TTL = 2
+# Model status fetched most recently, along with the time of fetching, for each `ops_test`
+_model_status_cache: Dict[int, Tuple[float, Any]] = {}
+CONFIG_PATHS_TO_COMPARE = {
+    "root['receivers']",
+    "root['route']['receiver']",
+    "root['route']['group_by']",
+    "root['route']['group_wait']",
+    "root['route']['group_interval']",
+    "root['route']['repeat_interval']",
+}
+
+
+# Module-scoped, as that's the widest scope of pytest-operator's `ops_test`
+@pytest.fixture(scope="module")
+async def deployed_model(ops_test: OpsTest):
+    # Both deploys are in flight at once, so the two image pulls overlap
+    deploy_alertmanager_k8s = asyncio.create_task(_deploy_alertmanager_k8s(ops_test))
+    deploy_alertmanager_configurer = asyncio.create_task(
+        _build_and_deploy_alertmanager_configurer(ops_test)
+    )
+    await asyncio.gather(deploy_alertmanager_k8s, deploy_alertmanager_configurer)
+    _invalidate_model_status(ops_test)
 
 
 class TestAlertmanagerConfigurerOperatorCharm:
     @pytest.fixture(scope="module")
+    async def alertmanager(self, ops_test: OpsTest, deployed_model):
+        alertmanager_ip = await _unit_address(ops_test, ALERTMANAGER_APP_NAME, 0)
+        alertmanager = Alertmanager(host=alertmanager_ip)
+        yield alertmanager
+        await alertmanager.aclose()
+
+    @pytest.fixture(scope="module")
+    async def http_client(self):
+        async with httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=10)
+        ) as http_client:
+            yield http_client
+
+    # Marks on fixtures have no effect, so a failed deployment aborts the run from here
     @pytest.mark.abort_on_fail
-    async def setup(self, ops_test: OpsTest):
-        await ops_test.model.set_config({"update-status-hook-interval": "2s"})
-        await self._deploy_alertmanager_k8s(ops_test)
-        charm = await ops_test.build_charm(".")
-        resources = {
-            f"{ALERTMANAGER_CONFIGURER_APP_NAME}-image": METADATA["resources"][
-                f"{ALERTMANAGER_CONFIGURER_APP_NAME}-image"
-            ]["upstream-source"],
-            "dummy-http-server-image": METADATA["resources"]["dummy-http-server-image"][
-                "upstream-source"
-            ],
-        }
-        await ops_test.model.deploy(
-            charm,
-            resources=resources,
-            application_name=ALERTMANAGER_CONFIGURER_APP_NAME,
-            trust=True,
-            series="focal",
+    async def test_given_alertmanager_and_alertmanager_configurer_charms_when_deployed_then_both_applications_are_in_the_model(  # noqa: E501
+        self, ops_test: OpsTest, deployed_model
+    ):
+        assert {ALERTMANAGER_APP_NAME, ALERTMANAGER_CONFIGURER_APP_NAME} <= set(
+            ops_test.model.applications
         )
 
     @pytest.mark.abort_on_fail
     async def test_given_alertmanager_configurer_charm_is_not_related_to_alertmanager_when_charm_deployed_then_charm_goes_to_blocked_status(  # noqa: E501
-        self, ops_test: OpsTest, setup
+        self, ops_test: OpsTest, deployed_model
     ):
-        await ops_test.model.wait_for_idle(
-            apps=[ALERTMANAGER_CONFIGURER_APP_NAME],
-            status="blocked",
-            timeout=WAIT_FOR_STATUS_TIMEOUT,
+        await _poll_until(
+            lambda: _app_status_is(ops_test, ALERTMANAGER_CONFIGURER_APP_NAME, "blocked")
         )
 
     @pytest.mark.abort_on_fail
     async def test_given_alertmanager_configurer_charm_in_blocked_status_when_alertmanager_relation_created_then_charm_goes_to_active_status(  # noqa: E501, W505
-        self, ops_test: OpsTest, setup
+        self, ops_test: OpsTest, deployed_model
     ):
         await ops_test.model.add_relation(
             relation1=f"{ALERTMANAGER_CONFIGURER_APP_NAME}",
             relation2=f"{ALERTMANAGER_APP_NAME}:remote-configuration",
         )
+        _invalidate_model_status(ops_test)
         await ops_test.model.wait_for_idle(
             apps=[ALERTMANAGER_CONFIGURER_APP_NAME],
             status="active",
             timeout=WAIT_FOR_STATUS_TIMEOUT,
+            idle_period=5,
         )
 
     @pytest.mark.abort_on_fail
     async def test_given_alertmanager_configurer_running_when_post_sent_to_the_dummy_http_server_called_then_server_responds_with_200(  # noqa: E501
-        self, ops_test: OpsTest, setup
+        self, ops_test: OpsTest, deployed_model, http_client: httpx.AsyncClient
     ):
         dummy_http_server_ip = await _unit_address(ops_test, ALERTMANAGER_CONFIGURER_APP_NAME, 0)
-        dummy_server_response = requests.post(
+        dummy_server_response = await http_client.post(
             f"http://{dummy_http_server_ip}:{DUMMY_HTTP_SERVER_PORT}"
         )
         assert dummy_server_response.status_code == 200
 
     @pytest.mark.abort_on_fail
     async def test_given_alertmanager_configurer_ready_when_get_alertmanager_config_then_alertmanager_has_config_from_alertmanager_configurer(  # noqa: E501
-        self, ops_test: OpsTest, setup
+        self, ops_test: OpsTest, deployed_model, alertmanager: Alertmanager
     ):
-        expected_config = deepcopy(ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG)
-        expected_config = await _add_juju_topology_to_group_by(expected_config)
+        expected_config = json.loads(ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG_JSON)
+        expected_config = _add_juju_topology_to_group_by(expected_config)
 
-        alertmanager_config_raw = await _get_alertmanager_config(
-            ops_test, ALERTMANAGER_APP_NAME, 0
-        )
-        alertmanager_config = yaml.safe_load(alertmanager_config_raw)
+        alertmanager_config_raw = await alertmanager.config()
+        alertmanager_config = yaml.load(alertmanager_config_raw, Loader=SafeLoader)
 
-        assert await _get_config_difs(expected_config, alertmanager_config) == {}
+        assert _get_config_difs(expected_config, alertmanager_config) == {}
 
     @pytest.mark.abort_on_fail
     async def test_given_alertmanager_configurer_ready_when_new_receiver_created_then_alertmanager_config_is_updated_with_the_new_receiver(  # noqa: E501
-        self, ops_test: OpsTest, setup
+        self,
+        ops_test: OpsTest,
+        deployed_model,
+        alertmanager: Alertmanager,
+        http_client: httpx.AsyncClient,
     ):
         test_receiver_json = {
             "name": f"{TEST_RECEIVER_NAME}",
             "webhook_configs": [{"url": "http://receiver_example.com"}],
         }
-        expected_config = deepcopy(ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG)
-        expected_config = await _add_juju_topology_to_group_by(expected_config)
-        expected_config = await _add_new_receiver(expected_config, test_receiver_json)
+        expected_config = json.loads(ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG_JSON)
+        expected_config = _add_juju_topology_to_group_by(expected_config)
+        expected_config = _add_new_receiver(expected_config, test_receiver_json)
         alertmanager_configurer_server_ip = await _unit_address(
             ops_test, ALERTMANAGER_CONFIGURER_APP_NAME, 0
         )
 
-        server_response = requests.post(
+        server_response = await http_client.post(
             f"http://{alertmanager_configurer_server_ip}:9101/v1/{TEST_TENANT}/receiver",
             json=test_receiver_json,
         )
@@ -127,24 +169,26 @@ class TestAlertmanagerConfigurerOperatorCharm:
             idle_period=5,
         )
 
-        alertmanager_config_raw = await _get_alertmanager_config(
-            ops_test, ALERTMANAGER_APP_NAME, 0
-        )
-        alertmanager_config = yaml.safe_load(alertmanager_config_raw)
+        alertmanager_config_raw = await alertmanager.config()
+        alertmanager_config = yaml.load(alertmanager_config_raw, Loader=SafeLoader)
 
-        assert await _get_config_difs(expected_config, alertmanager_config) == {}
+        assert _get_config_difs(expected_config, alertmanager_config) == {}
 
     @pytest.mark.abort_on_fail
     async def test_given_alertmanager_configurer_ready_when_delete_receiver_then_receiver_is_removed_from_alertmanager_config(  # noqa: E501
-        self, ops_test: OpsTest, setup
+        self,
+        ops_test: OpsTest,
+        deployed_model,
+        alertmanager: Alertmanager,
+        http_client: httpx.AsyncClient,
     ):
-        expected_config = deepcopy(ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG)
-        expected_config = await _add_juju_topology_to_group_by(expected_config)
+        expected_config = json.loads(ALERTMANAGER_CONFIGURER_DEFAULT_CONFIG_JSON)
+        expected_config = _add_juju_topology_to_group_by(expected_config)
         alertmanager_configurer_server_ip = await _unit_address(
             ops_test, ALERTMANAGER_CONFIGURER_APP_NAME, 0
         )
 
-        server_response = requests.delete(
+        server_response = await http_client.delete(
             f"http://{alertmanager_configurer_server_ip}:9101/v1/{TEST_TENANT}/receiver/{TEST_RECEIVER_NAME}"  # noqa: E501, W505
         )
         assert server_response.status_code == 200
@@ -157,16 +201,15 @@ class TestAlertmanagerConfigurerOperatorCharm:
             idle_period=5,
         )
 
-        alertmanager_config_raw = await _get_alertmanager_config(
-            ops_test, ALERTMANAGER_APP_NAME, 0
-        )
-        alertmanager_config = yaml.safe_load(alertmanager_config_raw)
+        alertmanager_config_raw = await alertmanager.config()
+        alertmanager_config = yaml.load(alertmanager_config_raw, Loader=SafeLoader)
 
-        assert await _get_config_difs(expected_config, alertmanager_config) == {}
+        assert _get_config_difs(expected_config, alertmanager_config) == {}
 
     @pytest.mark.abort_on_fail
-    async def test_scale_up(self, ops_test: OpsTest, setup):
+    async def test_scale_up(self, ops_test: OpsTest, deployed_model):
         await ops_test.model.applications[ALERTMANAGER_CONFIGURER_APP_NAME].scale(2)
+        _invalidate_model_status(ops_test)
 
         await ops_test.model.wait_for_idle(
             apps=[ALERTMANAGER_CONFIGURER_APP_NAME],
@@ -177,86 +220,154 @@ class TestAlertmanagerConfigurerOperatorCharm:
         )
 
     @pytest.mark.xfail(reason="Bug in Juju: https://bugs.launchpad.net/juju/+bug/1977582")
-    async def test_scale_down(self, ops_test: OpsTest, setup):
+    async def test_scale_down(self, ops_test: OpsTest, deployed_model):
         await ops_test.model.applications[ALERTMANAGER_CONFIGURER_APP_NAME].scale(1)
+        _invalidate_model_status(ops_test)
 
         await ops_test.model.wait_for_idle(
             apps=[ALERTMANAGER_CONFIGURER_APP_NAME],
             status="active",
             timeout=60,
+            idle_period=5,
             wait_for_exact_units=1,
         )
 
-    @staticmethod
-    async def _deploy_alertmanager_k8s(ops_test: OpsTest):
-        await ops_test.model.deploy(
-            ALERTMANAGER_APP_NAME,
-            application_name=ALERTMANAGER_APP_NAME,
-            channel="stable",
-            trust=True,
-            series="focal",
-        )
 
+async def _build_and_deploy_alertmanager_configurer(ops_test: OpsTest):
+    charm = await ops_test.build_charm(".")
+    resources = {
+        f"{ALERTMANAGER_CONFIGURER_APP_NAME}-image": ALERTMANAGER_CONFIGURER_IMAGE,
+        "dummy-http-server-image": DUMMY_HTTP_SERVER_IMAGE,
+    }
+    await ops_test.model.deploy(
+        charm,
+        resources=resources,
+        application_name=ALERTMANAGER_CONFIGURER_APP_NAME,
+        trust=True,
+        series="focal",
+    )
 
-async def _unit_address(ops_test: OpsTest, app_name: str, unit_num: int) -> str:
-    """Find unit address for any application.
+
+async def _deploy_alertmanager_k8s(ops_test: OpsTest):
+    await ops_test.model.deploy(
+        ALERTMANAGER_APP_NAME,
+        application_name=ALERTMANAGER_APP_NAME,
+        channel="stable",
+        trust=True,
+        series="focal",
+    )
+
+
+async def _poll_until(
+    predicate: Callable[[], Awaitable[bool]],
+    interval: float = POLL_INTERVAL,
+    timeout: float = WAIT_FOR_STATUS_TIMEOUT,
+) -> None:
+    """Awaits given predicate every `interval` seconds until it's true.
+
+    Args:
+        predicate: async function returning True once the wait is over
+        interval: seconds between two checks
+        timeout: seconds after which the wait is given up
+
+    Raises:
+        TimeoutError: if the predicate isn't true within `timeout` seconds
+    """
+    deadline = time.monotonic() + timeout
+    while not await predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Condition not met within {timeout} seconds")
+        await asyncio.sleep(interval)
+
+
+async def _app_status_is(ops_test: OpsTest, app_name: str, status: str) -> bool:
+    """Checks whether given application is in given status.
 
     Args:
         ops_test: pytest-operator plugin
         app_name: string name of application
-        unit_num: integer number of a juju unit
+        status: expected workload status of the application
 
     Returns:
-        str: unit address as a string
+        bool: True if the application is in given status, False otherwise
     """
+    model_status = await ops_test.model.get_status()
+    return model_status["applications"][app_name]["status"]["status"] == status
+
+
+async def _model_status(ops_test: OpsTest) -> Any:
+    """Returns model status, fetching it from the controller at most every couple of seconds.
+
+    Args:
+        ops_test: pytest-operator plugin
+
+    Returns:
+        FullStatus: model status
+    """
+    now = time.monotonic()
+    cached = _model_status_cache.get(id(ops_test))
+    if cached and now - cached[0] < MODEL_STATUS_CACHE_TTL:
+        return cached[1]
     status = await ops_test.model.get_status()
-    return status["applications"][app_name]["units"][f"{app_name}/{unit_num}"]["address"]
+    _model_status_cache[id(ops_test)] = (now, status)
+    return status
+
+
+def _invalidate_model_status(ops_test: OpsTest) -> None:
+    """Forgets cached model status after a change to the model.
+
+    Args:
+        ops_test: pytest-operator plugin
+    """
+    _model_status_cache.pop(id(ops_test), None)
 
 
-async def _get_alertmanager_config(ops_test: OpsTest, app_name: str, unit_num: int) -> str:
-    """Fetch Alertmanager config.
+async def _unit_address(ops_test: OpsTest, app_name: str, unit_num: int) -> str:
+    """Find unit address for any application.
 
     Args:
         ops_test: pytest-operator plugin
-        app_name: string name of Prometheus application
-        unit_num: integer number of a Prometheus juju unit
+        app_name: string name of application
+        unit_num: integer number of a juju unit
 
     Returns:
-          str: YAML config in string format or empty string
+        str: unit address as a string
     """
-    host = await _unit_address(ops_test, app_name, unit_num)
-    alertmanager = Alertmanager(host=host)
-    config = await alertmanager.config()
-    return config
+    status = await _model_status(ops_test)
+    return status["applications"][app_name]["units"][f"{app_name}/{unit_num}"]["address"]
 
 
-async def _add_juju_topology_to_group_by(config: dict) -> dict:
+def _add_juju_topology_to_group_by(config: dict) -> dict:
     route = cast(dict, config.get("route", {}))
-    route["group_by"] = list(
-        set(route.get("group_by", [])).union(["juju_application", "juju_model", "juju_model_uuid"])
-    )
+    group_by = route.get("group_by", [])
+    seen = set(group_by)
+    for label in ("juju_application", "juju_model", "juju_model_uuid"):
+        if label not in seen:
+            group_by.append(label)
+            seen.add(label)
+    route["group_by"] = group_by
     config["route"] = route
     return config
 
 
-async def _add_new_receiver(config: dict, receiver_json: dict) -> dict:
+def _add_new_receiver(config: dict, receiver_json: dict) -> dict:
     receiver = deepcopy(receiver_json)
     receivers = config.get("receivers")
-    new_receiver = await _update_receiver_name_with_tenant_id(receiver)
-    new_receiver = await _add_default_webhook_configs(new_receiver)
+    new_receiver = _update_receiver_name_with_tenant_id(receiver)
+    new_receiver = _add_default_webhook_configs(new_receiver)
     receivers.append(new_receiver)
     config["receivers"] = receivers
     return config
 
 
-async def _update_receiver_name_with_tenant_id(receiver: dict) -> dict:
+def _update_receiver_name_with_tenant_id(receiver: dict) -> dict:
     receiver_name = receiver["name"]
     new_name = f"{TEST_TENANT}_{receiver_name}"
     receiver["name"] = new_name
     return receiver
 
 
-async def _add_default_webhook_configs(receiver: dict) -> dict:
+def _add_default_webhook_configs(receiver: dict) -> dict:
     default_webhook_configs = {
         "send_resolved": False,
         "http_config": {"follow_redirects": True},
@@ -268,36 +379,10 @@ async def _add_default_webhook_configs(receiver: dict) -> dict:
     return receiver
 
 
-async def _get_config_difs(expected_config: dict, actual_config: dict) -> dict:
-    difs = {}
-    difs.update(
-        DeepDiff(actual_config["receivers"], expected_config["receivers"], ignore_order=True)
-    )
-    difs.update(
-        DeepDiff(
-            actual_config["route"]["receiver"],
-            expected_config["route"]["receiver"],
-            ignore_order=True,
-        )
-    )
-    difs.update(
-        DeepDiff(
-            actual_config["route"]["group_by"],
-            expected_config["route"]["group_by"],
-            ignore_order=True,
-        )
-    )
-    difs.update(
-        DeepDiff(actual_config["route"]["group_wait"], expected_config["route"]["group_wait"])
-    )
-    difs.update(
-        DeepDiff(
-            actual_config["route"]["group_interval"], expected_config["route"]["group_interval"]
-        )
-    )
-    difs.update(
-        DeepDiff(
-            actual_config["route"]["repeat_interval"], expected_config["route"]["repeat_interval"]
-        )
+def _get_config_difs(expected_config: dict, actual_config: dict) -> dict:
+    return DeepDiff(
+        actual_config,
+        expected_config,
+        ignore_order=True,
+        include_paths=CONFIG_PATHS_TO_COMPARE,
     )
-    return difs
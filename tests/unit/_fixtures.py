@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Test data and setup shared between the charm unit test modules."""
+
+import functools
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from ops import testing
+
+from charm import AlertmanagerConfigurerOperatorCharm
+
+TEST_MULTITENANT_LABEL = "some_test_label"
+TEST_CONFIG = f"""options:
+  multitenant_label:
+    type: string
+    description: |
+      Alertmanager Configurer has been designed to support multiple tenants. In a multitenant
+      Alertmanager Configurer setup, each alert is first routed on the tenancy label, and then
+      the routing tree is distinct for each tenant.
+    default: {TEST_MULTITENANT_LABEL}
+"""
+TEST_ALERTMANAGER_DEFAULT_CONFIG_FILE = "./tests/unit/test_config/alertmanager_default.yml"
+TEST_ALERTMANAGER_CONFIG_FILE = "/test/rules/dir/config_file.yml"
+TEST_ALERTMANAGER_CONFIGURER_PORT = 1234
+TEST_DUMMY_HTTP_SERVER_HOST = "testhost"
+TEST_DUMMY_HTTP_SERVER_PORT = 4321
+EXPECTED_ALERTMANAGER_CONFIGURER_PLAN = {
+    "services": {
+        "alertmanager-configurer": {
+            "override": "replace",
+            "startup": "enabled",
+            "command": "alertmanager_configurer "
+            f"-port={TEST_ALERTMANAGER_CONFIGURER_PORT} "
+            f"-alertmanager-conf={TEST_ALERTMANAGER_CONFIG_FILE} "
+            f"-alertmanagerURL={TEST_DUMMY_HTTP_SERVER_HOST}:{TEST_DUMMY_HTTP_SERVER_PORT} "
+            f"-multitenant-label={TEST_MULTITENANT_LABEL} "
+            "-delete-route-with-receiver=true ",
+        }
+    }
+}
+EXPECTED_DUMMY_HTTP_SERVER_PLAN = {
+    "services": {
+        "dummy-http-server": {
+            "override": "replace",
+            "startup": "enabled",
+            "command": "nginx",
+        }
+    }
+}
+ALERTMANAGER_CLASS = "charm.AlertmanagerConfigurerOperatorCharm"
+
+
+@functools.lru_cache(maxsize=None)
+def default_alertmanager_config() -> str:
+    """Returns the content of the default Alertmanager config used in tests.
+
+    The file is read only once per test session, no matter how many modules use it.
+    """
+    return Path(TEST_ALERTMANAGER_DEFAULT_CONFIG_FILE).read_text()
+
+
+class CharmHarnessSetUp:
+    """Sets up a Harness for the charm, with the leadership set through `LEADER`.
+
+    Mixed into `unittest.TestCase` classes.
+    """
+
+    LEADER = True
+
+    @classmethod
+    def setUpClass(cls):
+        # The charm never uses its Kubernetes service patch unless install or upgrade-charm is
+        # emitted, so a single no-op stand-in serves all the tests of the class
+        kubernetes_service_patch = patch("charm.KubernetesServicePatch", lambda charm, ports: None)
+        kubernetes_service_patch.start()
+        cls.addClassCleanup(kubernetes_service_patch.stop)
+
+    def setUp(self):
+        config_cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(config_cache_dir.cleanup)
+        class_constants_patch = patch.multiple(
+            ALERTMANAGER_CLASS,
+            ALERTMANAGER_CONFIG_FILE=TEST_ALERTMANAGER_CONFIG_FILE,
+            ALERTMANAGER_DEFAULT_CONFIG_FILE=TEST_ALERTMANAGER_DEFAULT_CONFIG_FILE,
+            ALERTMANAGER_CONFIG_CACHE_FILE=os.path.join(
+                config_cache_dir.name, "config-cache.json"
+            ),
+            ALERTMANAGER_CONFIGURER_PORT=TEST_ALERTMANAGER_CONFIGURER_PORT,
+            ALERTMANAGER_CONFIGURER_PORT_STR=str(TEST_ALERTMANAGER_CONFIGURER_PORT),
+            DUMMY_HTTP_SERVER_HOST=TEST_DUMMY_HTTP_SERVER_HOST,
+            DUMMY_HTTP_SERVER_PORT=TEST_DUMMY_HTTP_SERVER_PORT,
+        )
+        class_constants_patch.start()
+        self.addCleanup(class_constants_patch.stop)
+        self.harness = testing.Harness(AlertmanagerConfigurerOperatorCharm, config=TEST_CONFIG)
+        self.addCleanup(self.harness.cleanup)
+        self.harness.set_leader(self.LEADER)
+        self.harness.begin()
+        self.alertmanager_configurer_container_name = (
+            self.harness.charm.ALERTMANAGER_CONFIGURER_SERVICE_NAME
+        )
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# Copyright 2022 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Tests shared between the leader and non-leader charm unit test modules."""
+
+from unittest.mock import Mock, PropertyMock, patch
+
+from _fixtures import (
+    ALERTMANAGER_CLASS,
+    EXPECTED_ALERTMANAGER_CONFIGURER_PLAN,
+    EXPECTED_DUMMY_HTTP_SERVER_PLAN,
+    TEST_ALERTMANAGER_CONFIG_FILE,
+    CharmHarnessSetUp,
+    default_alertmanager_config,
+)
+from ops.model import ActiveStatus, BlockedStatus, WaitingStatus
+
+
+class CharmTestsBase(CharmHarnessSetUp):
+    """Tests whose outcome doesn't depend on the unit's leadership.
+
+    Mixed into a `unittest.TestCase` for each leadership state, set through `LEADER`. It isn't
+    a `TestCase` itself, so that it's never collected and run on its own.
+    """
+
+    @patch("charm.AlertmanagerConfigDirWatcher")
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_DIR", new_callable=PropertyMock)
+    @patch("ops.model.Container.push", Mock())
+    def test_given_alertmanager_config_directory_and_can_connect_to_workload_when_start_then_watchdog_starts_watching_alertmanager_config_directory(  # noqa: E501
+        self, patched_config_dir, patched_alertmanager_config_dir_watcher
+    ):
+        self.harness.set_can_connect(
+            container=self.alertmanager_configurer_container_name, val=True
+        )
+        test_config_dir = "/test/rules/dir"
+        patched_config_dir.return_value = test_config_dir
+        self.harness.charm.on.start.emit()
+
+        patched_alertmanager_config_dir_watcher.assert_called_with(
+            self.harness.charm, test_config_dir
+        )
+
+    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
+    def test_given_alertmanager_relation_not_created_when_pebble_ready_then_charm_goes_to_blocked_state(  # noqa: E501
+        self,
+    ):
+        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+
+        assert self.harness.charm.unit.status == BlockedStatus(
+            "Waiting for alertmanager relation to be created"
+        )
+
+    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
+    def test_given_alertmanager_relation_created_and_alertmanager_configurer_container_ready_but_dummy_http_server_not_yet_ready_when_alertmanager_configurer_pebble_ready_then_charm_goes_to_waiting_state(  # noqa: E501
+        self,
+    ):
+        self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+
+        assert self.harness.charm.unit.status == WaitingStatus(
+            "Waiting for the dummy HTTP server to be ready"
+        )
+
+    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
+    def test_given_prometheus_relation_created_and_prometheus_configurer_container_ready_when_pebble_ready_then_pebble_plan_is_updated_with_correct_pebble_layer(  # noqa: E501
+        self,
+    ):
+        self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.container_pebble_ready("dummy-http-server")
+        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+
+        updated_plan = self.harness.get_container_pebble_plan(
+            self.alertmanager_configurer_container_name
+        ).to_dict()
+        self.assertEqual(EXPECTED_ALERTMANAGER_CONFIGURER_PLAN, updated_plan)
+
+    def test_given_dummy_http_server_container_ready_when_pebble_ready_then_pebble_plan_is_updated_with_correct_pebble_layer(  # noqa: E501
+        self,
+    ):
+        self.harness.container_pebble_ready("dummy-http-server")
+
+        updated_plan = self.harness.get_container_pebble_plan("dummy-http-server").to_dict()
+        self.assertEqual(EXPECTED_DUMMY_HTTP_SERVER_PLAN, updated_plan)
+
+    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
+    def test_given_alertmanager_relation_created_and_alertmanager_configurer_container_ready_when_pebble_ready_then_charm_goes_to_active_state(  # noqa: E501
+        self,
+    ):
+        self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.set_can_connect("dummy-http-server", True)
+        self.harness.container_pebble_ready("dummy-http-server")
+
+        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+
+        assert self.harness.charm.unit.status == ActiveStatus()
+
+    @patch("ops.model.Container.push")
+    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
+    def test_given_alertmanager_default_config_and_can_connect_to_workload_container_when_start_then_alertmanager_config_is_created_using_default_data(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(
+            container=self.alertmanager_configurer_container_name, val=True
+        )
+        pushed_files = {}
+        patched_push.side_effect = lambda path, source: pushed_files.update({path: source.read()})
+
+        self.harness.charm.on.start.emit()
+
+        self.assertEqual(
+            pushed_files[TEST_ALERTMANAGER_CONFIG_FILE], default_alertmanager_config().encode()
+        )
+
+    @patch("ops.model.Container.push")
+    def test_given_alertmanager_default_config_and_cant_connect_to_workload_container_when_start_then_alertmanager_config_is_not_created(  # noqa: E501
+        self, patched_push
+    ):
+        self.harness.set_can_connect(
+            container=self.alertmanager_configurer_container_name, val=False
+        )
+
+        self.harness.charm.on.start.emit()
+
+        patched_push.assert_not_called()
+
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_non_existent_config_file_when_alertmanager_config_file_changed_then_charm_goes_to_blocked_state(  # noqa: E501
+        self, patched_alertmanager_config_file
+    ):
+        test_config_file = "whatever"
+        patched_alertmanager_config_file.return_value = test_config_file
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+
+        assert self.harness.charm.unit.status == BlockedStatus(
+            "Error reading Alertmanager config file"
+        )
@@ -2,161 +2,149 @@
 # Copyright 2022 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import copy
 import json
+import os
+import tempfile
 import unittest
 from unittest.mock import Mock, PropertyMock, patch
 
 import yaml
-from ops import testing
-from ops.model import ActiveStatus, BlockedStatus, WaitingStatus
-
-from charm import AlertmanagerConfigurerOperatorCharm
-
-TEST_MULTITENANT_LABEL = "some_test_label"
-TEST_CONFIG = f"""options:
-  multitenant_label:
-    type: string
-    description: |
-      Alertmanager Configurer has been designed to support multiple tenants. In a multitenant
-      Alertmanager Configurer setup, each alert is first routed on the tenancy label, and then
-      the routing tree is distinct for each tenant.
-    default: {TEST_MULTITENANT_LABEL}
-"""
-with open("./tests/unit/test_config/alertmanager_default.yml", "r") as default_yaml:
-    TEST_ALERTMANAGER_DEFAULT_CONFIG = default_yaml.read()
-TEST_ALERTMANAGER_CONFIG_FILE = "/test/rules/dir/config_file.yml"
-ALERTMANAGER_CLASS = "charm.AlertmanagerConfigurerOperatorCharm"
-
-
-class TestAlertmanagerConfigurerOperatorCharmLeader(unittest.TestCase):
-    @patch("charm.KubernetesServicePatch", lambda charm, ports: None)
-    def setUp(self):
-        testing.SIMULATE_CAN_CONNECT = True
-        self.harness = testing.Harness(AlertmanagerConfigurerOperatorCharm, config=TEST_CONFIG)
-        self.addCleanup(self.harness.cleanup)
-        self.harness.set_leader(True)
-        self.harness.begin()
-        self.alertmanager_configurer_container_name = (
-            self.harness.charm.ALERTMANAGER_CONFIGURER_SERVICE_NAME
-        )
+from _fixtures import (
+    ALERTMANAGER_CLASS,
+    TEST_ALERTMANAGER_CONFIGURER_PORT,
+)
+from charm_tests_base import CharmTestsBase
+from ops.model import ActiveStatus, BlockedStatus
 
-    @patch("charm.AlertmanagerConfigDirWatcher")
-    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_DIR", new_callable=PropertyMock)
-    @patch("ops.model.Container.push", Mock())
-    def test_given_alertmanager_config_directory_and_can_connect_to_workload_when_start_then_watchdog_starts_watching_alertmanager_config_directory(  # noqa: E501
-        self, patched_config_dir, patched_alertmanager_config_dir_watcher
-    ):
-        self.harness.set_can_connect(
-            container=self.alertmanager_configurer_container_name, val=True
-        )
-        test_config_dir = "/test/rules/dir"
-        patched_config_dir.return_value = test_config_dir
-        self.harness.charm.on.start.emit()
+import charm
+from charm import RemoteConfigurationProvider
 
-        patched_alertmanager_config_dir_watcher.assert_called_with(
-            self.harness.charm, test_config_dir
-        )
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
 
-    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
-    def test_given_alertmanager_relation_not_created_when_pebble_ready_then_charm_goes_to_blocked_state(  # noqa: E501
+with open("./tests/unit/test_config/alertmanager.yml", "r") as config_yaml:
+    EXPECTED_ALERTMANAGER_CONFIG = yaml.load(config_yaml, Loader=SafeLoader)
+EXPECTED_ALERTMANAGER_CONFIG_JSON = json.dumps(EXPECTED_ALERTMANAGER_CONFIG)
+
+
+class TestAlertmanagerConfigurerOperatorCharmLeader(CharmTestsBase, unittest.TestCase):
+    LEADER = True
+
+    def test_given_alertmanager_relation_not_created_when_charm_initialized_then_remote_configuration_provider_is_not_created(  # noqa: E501
         self,
     ):
-        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+        assert "remote_configuration_provider" not in self.harness.charm.__dict__
 
+    @patch("charm._parse_config_cached")
+    def test_given_alertmanager_relation_not_created_when_alertmanager_config_file_changed_then_config_is_not_read(  # noqa: E501
+        self, patched_parse_config_cached
+    ):
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+
+        patched_parse_config_cached.assert_not_called()
+        assert "remote_configuration_provider" not in self.harness.charm.__dict__
         assert self.harness.charm.unit.status == BlockedStatus(
             "Waiting for alertmanager relation to be created"
         )
 
     @patch("charm.AlertmanagerConfigDirWatcher", Mock())
-    def test_given_alertmanager_relation_created_and_alertmanager_configurer_container_ready_but_dummy_http_server_not_yet_ready_when_alertmanager_configurer_pebble_ready_then_charm_goes_to_waiting_state(  # noqa: E501
+    def test_given_multitenant_label_changed_when_pebble_ready_then_pebble_plan_is_updated_with_new_multitenant_label(  # noqa: E501
         self,
     ):
+        test_multitenant_label = "new_test_label"
         self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.container_pebble_ready("dummy-http-server")
         self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
 
-        assert self.harness.charm.unit.status == WaitingStatus(
-            "Waiting for the dummy HTTP server to be ready"
+        self.harness.update_config({"multitenant_label": test_multitenant_label})
+        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+
+        updated_plan = self.harness.get_container_pebble_plan(
+            self.alertmanager_configurer_container_name
+        ).to_dict()
+        assert (
+            f"-multitenant-label={test_multitenant_label} "
+            in updated_plan["services"][self.alertmanager_configurer_container_name]["command"]
         )
 
-    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
-    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIGURER_PORT", new_callable=PropertyMock)
-    @patch(f"{ALERTMANAGER_CLASS}.DUMMY_HTTP_SERVER_HOST", new_callable=PropertyMock)
-    @patch(f"{ALERTMANAGER_CLASS}.DUMMY_HTTP_SERVER_PORT", new_callable=PropertyMock)
     @patch("charm.AlertmanagerConfigDirWatcher", Mock())
-    def test_given_prometheus_relation_created_and_prometheus_configurer_container_ready_when_pebble_ready_then_pebble_plan_is_updated_with_correct_pebble_layer(  # noqa: E501
+    def test_given_alertmanager_configurer_layer_already_applied_when_alertmanager_configurer_service_started_again_then_pebble_is_not_called(  # noqa: E501
         self,
-        patched_dummy_http_server_port,
-        patched_dummy_http_server_host,
-        patched_alertmanager_configurer_port,
-        patched_alertmanager_config_file,
     ):
-        test_dummy_http_server_port = 4321
-        test_dummy_http_server_host = "testhost"
-        test_alertmanager_configurer_port = 1234
-        patched_dummy_http_server_port.return_value = test_dummy_http_server_port
-        patched_dummy_http_server_host.return_value = test_dummy_http_server_host
-        patched_alertmanager_configurer_port.return_value = test_alertmanager_configurer_port
-        patched_alertmanager_config_file.return_value = TEST_ALERTMANAGER_CONFIG_FILE
         self.harness.add_relation("alertmanager", "alertmanager-k8s")
         self.harness.container_pebble_ready("dummy-http-server")
-        expected_plan = {
-            "services": {
-                f"{self.alertmanager_configurer_container_name}": {
-                    "override": "replace",
-                    "startup": "enabled",
-                    "command": "alertmanager_configurer "
-                    f"-port={test_alertmanager_configurer_port} "
-                    f"-alertmanager-conf={TEST_ALERTMANAGER_CONFIG_FILE} "
-                    "-alertmanagerURL="
-                    f"{test_dummy_http_server_host}:{test_dummy_http_server_port} "
-                    f"-multitenant-label={TEST_MULTITENANT_LABEL} "
-                    "-delete-route-with-receiver=true ",
-                }
-            }
-        }
-
         self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
 
-        updated_plan = self.harness.get_container_pebble_plan(
-            self.alertmanager_configurer_container_name
-        ).to_dict()
-        self.assertEqual(expected_plan, updated_plan)
+        with patch("ops.model.Container.get_plan") as patched_get_plan, patch(
+            "ops.model.Container.add_layer"
+        ) as patched_add_layer:
+            self.harness.charm._start_alertmanager_configurer_service()
 
-    def test_given_dummy_http_server_container_ready_when_pebble_ready_then_pebble_plan_is_updated_with_correct_pebble_layer(  # noqa: E501
+        patched_get_plan.assert_not_called()
+        patched_add_layer.assert_not_called()
+
+    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
+    def test_given_alertmanager_configurer_layer_already_applied_when_alertmanager_configurer_pebble_ready_then_layer_is_applied_again(  # noqa: E501
         self,
     ):
-        expected_plan = {
-            "services": {
-                "dummy-http-server": {
-                    "override": "replace",
-                    "startup": "enabled",
-                    "command": "nginx",
-                }
-            }
-        }
+        self.harness.add_relation("alertmanager", "alertmanager-k8s")
         self.harness.container_pebble_ready("dummy-http-server")
+        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
 
-        updated_plan = self.harness.get_container_pebble_plan("dummy-http-server").to_dict()
-        self.assertEqual(expected_plan, updated_plan)
+        with patch("ops.model.Container.add_layer") as patched_add_layer:
+            self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
 
-    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
-    def test_given_alertmanager_relation_created_and_alertmanager_configurer_container_ready_when_pebble_ready_then_charm_goes_to_active_state(  # noqa: E501
+        patched_add_layer.assert_called_once()
+
+    @patch("ops.model.Container.restart")
+    def test_given_dummy_http_server_layer_already_applied_but_service_stopped_when_pebble_ready_then_service_is_started_without_restart(  # noqa: E501
+        self, patched_restart
+    ):
+        self.harness.container_pebble_ready("dummy-http-server")
+        container = self.harness.model.unit.get_container("dummy-http-server")
+        container.stop("dummy-http-server")
+        patched_restart.reset_mock()
+
+        self.harness.container_pebble_ready("dummy-http-server")
+
+        patched_restart.assert_not_called()
+        assert container.get_service("dummy-http-server").is_running()
+
+    def test_given_unit_active_when_dummy_http_server_pebble_ready_again_then_unit_stays_active(  # noqa: E501
         self,
     ):
-        self.harness.add_relation("alertmanager", "alertmanager-k8s")
-        self.harness.set_can_connect("dummy-http-server", True)
         self.harness.container_pebble_ready("dummy-http-server")
+        self.harness.charm.unit.status = ActiveStatus()
 
-        self.harness.container_pebble_ready(self.alertmanager_configurer_container_name)
+        self.harness.container_pebble_ready("dummy-http-server")
+
+        self.assertEqual(self.harness.charm.unit.status, ActiveStatus())
+
+    @patch("ops.model.Container.get_service")
+    def test_given_dummy_http_server_running_checked_multiple_times_within_a_hook_then_pebble_is_queried_once(  # noqa: E501
+        self, patched_get_service
+    ):
+        self.assertTrue(self.harness.charm._dummy_http_server_running)
+        self.assertTrue(self.harness.charm._dummy_http_server_running)
 
-        assert self.harness.charm.unit.status == ActiveStatus()
+        patched_get_service.assert_called_once_with("dummy-http-server")
+
+    @patch("ops.model.Container.get_plan")
+    def test_given_dummy_http_server_container_when_pebble_ready_then_layer_is_applied_without_reading_current_plan(  # noqa: E501
+        self, patched_get_plan
+    ):
+        self.harness.container_pebble_ready("dummy-http-server")
+
+        patched_get_plan.assert_not_called()
+        container = self.harness.model.unit.get_container("dummy-http-server")
+        assert container.get_service("dummy-http-server").is_running()
 
-    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIGURER_PORT", new_callable=PropertyMock)
     def test_given_alertmanager_configurer_service_when_alertmanager_configurer_relation_joined_then_alertmanager_configurer_service_name_and_port_are_pushed_to_the_relation_data_bag(  # noqa: E501
-        self, patched_alertmanager_configurer_port
+        self,
     ):
-        test_alertmanager_configurer_port = 1234
-        patched_alertmanager_configurer_port.return_value = test_alertmanager_configurer_port
         relation_id = self.harness.add_relation(
             self.alertmanager_configurer_container_name, self.harness.charm.app.name
         )
@@ -166,84 +154,277 @@ class TestAlertmanagerConfigurerOperatorCharmLeader(unittest.TestCase):
             self.harness.get_relation_data(relation_id, f"{self.harness.charm.app.name}"),
             {
                 "service_name": self.harness.charm.app.name,
-                "port": str(test_alertmanager_configurer_port),
+                "port": str(TEST_ALERTMANAGER_CONFIGURER_PORT),
             },
         )
 
-    @patch("ops.model.Container.push")
-    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_DEFAULT_CONFIG", new_callable=PropertyMock)
     @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
-    @patch("charm.AlertmanagerConfigDirWatcher", Mock())
-    def test_given_alertmanager_default_config_and_can_connect_to_workload_container_when_start_then_alertmanager_config_is_created_using_default_data(  # noqa: E501
-        self, patched_alertmanager_config_file, patched_alertmanager_default_config, patched_push
+    def test_given_alertmanager_config_in_config_dir_when_alertmanager_config_file_changed_then_config_is_pushed_to_the_data_bag(  # noqa: E501
+        self, patched_alertmanager_config_file
     ):
-        self.harness.set_can_connect(
-            container=self.alertmanager_configurer_container_name, val=True
-        )
-        patched_alertmanager_config_file.return_value = TEST_ALERTMANAGER_CONFIG_FILE
-        patched_alertmanager_default_config.return_value = TEST_ALERTMANAGER_DEFAULT_CONFIG
+        test_config_file = "./tests/unit/test_config/alertmanager.yml"
+        patched_alertmanager_config_file.return_value = test_config_file
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
 
-        self.harness.charm.on.start.emit()
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
 
-        patched_push.assert_any_call(
-            TEST_ALERTMANAGER_CONFIG_FILE, TEST_ALERTMANAGER_DEFAULT_CONFIG
+        self.assertEqual(
+            self.harness.get_relation_data(relation_id, "alertmanager-configurer-k8s")[
+                "alertmanager_config"
+            ],
+            EXPECTED_ALERTMANAGER_CONFIG_JSON,
         )
 
-    @patch("ops.model.Container.push")
-    def test_given_alertmanager_default_config_and_cant_connect_to_workload_container_when_start_then_alertmanager_config_is_not_created(  # noqa: E501
-        self, patched_push
+    @patch("charm._load_config_file", wraps=charm._load_config_file)
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_unchanged_alertmanager_config_file_when_alertmanager_config_file_changed_twice_then_config_file_is_parsed_only_once(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_load_config_file
     ):
-        self.harness.set_can_connect(
-            container=self.alertmanager_configurer_container_name, val=False
-        )
+        charm._parse_config_cached.cache_clear()
+        self.addCleanup(charm._parse_config_cached.cache_clear)
+        patched_alertmanager_config_file.return_value = "./tests/unit/test_config/alertmanager.yml"
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
 
-        self.harness.charm.on.start.emit()
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+        self.harness.charm._stored.last_config_hash = ""
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
 
-        patched_push.assert_not_called()
+        patched_load_config_file.assert_called_once()
 
+    @patch(f"{ALERTMANAGER_CLASS}._start_alertmanager_configurer")
     @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
-    @patch("charm.KubernetesServicePatch", lambda charm, ports: None)
-    def test_given_non_existent_config_file_when_alertmanager_config_file_changed_then_charm_goes_to_blocked_state(  # noqa: E501
-        self, patched_alertmanager_config_file
+    def test_given_unchanged_alertmanager_config_file_content_when_alertmanager_config_file_changed_twice_then_second_event_is_ignored(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_start_alertmanager_configurer
+    ):
+        patched_alertmanager_config_file.return_value = "./tests/unit/test_config/alertmanager.yml"
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+
+        patched_start_alertmanager_configurer.assert_called_once()
+
+    @patch(f"{ALERTMANAGER_CLASS}._start_alertmanager_configurer", Mock())
+    @patch.object(RemoteConfigurationProvider, "update_relation_data_bag")
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_unchanged_alertmanager_config_when_alertmanager_config_file_changed_twice_then_relation_data_bag_is_updated_only_once(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_update_relation_data_bag
+    ):
+        patched_alertmanager_config_file.return_value = "./tests/unit/test_config/alertmanager.yml"
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+        patched_update_relation_data_bag.reset_mock()
+
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+
+        patched_update_relation_data_bag.assert_called_once()
+
+    @patch(f"{ALERTMANAGER_CLASS}._start_alertmanager_configurer")
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_alertmanager_configurer_not_ready_when_alertmanager_config_file_changed_twice_then_second_event_is_not_ignored(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_start_alertmanager_configurer
     ):
-        test_config_file = "whatever"
+        patched_alertmanager_config_file.return_value = "./tests/unit/test_config/alertmanager.yml"
+        patched_start_alertmanager_configurer.side_effect = lambda event: event.defer()
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+
+        self.assertEqual(patched_start_alertmanager_configurer.call_count, 2)
+
+    @patch(f"{ALERTMANAGER_CLASS}._start_alertmanager_configurer", Mock())
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_CACHE_FILE", new_callable=PropertyMock)
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_unchanged_alertmanager_config_file_when_only_templates_file_content_changes_then_new_templates_are_pushed_to_the_data_bag(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_alertmanager_config_cache_file
+    ):
+        charm._parse_config_cached.cache_clear()
+        self.addCleanup(charm._parse_config_cached.cache_clear)
+        test_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(test_dir.cleanup)
+        test_config_file = os.path.join(test_dir.name, "alertmanager.yml")
+        test_templates_file = os.path.join(test_dir.name, "alertmanager.tmpl")
         patched_alertmanager_config_file.return_value = test_config_file
+        patched_alertmanager_config_cache_file.return_value = os.path.join(
+            test_dir.name, "cache.json"
+        )
+        test_config = copy.deepcopy(EXPECTED_ALERTMANAGER_CONFIG)
+        test_config["templates"] = [test_templates_file]
+        with open(test_config_file, "w") as config_file:
+            yaml.safe_dump(test_config, config_file)
+        with open(test_templates_file, "w") as templates_file:
+            templates_file.write('{{ define "initial" }}initial{{ end }}')
         relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
         self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
 
+        with open(test_templates_file, "w") as templates_file:
+            templates_file.write('{{ define "updated" }}updated{{ end }}')
         self.harness.charm.on.alertmanager_config_file_changed.emit()
 
-        assert self.harness.charm.unit.status == BlockedStatus(
-            "Error reading Alertmanager config file"
+        self.assertEqual(
+            self.harness.get_relation_data(relation_id, "alertmanager-configurer-k8s")[
+                "alertmanager_templates"
+            ],
+            json.dumps(['{{ define "updated" }}updated{{ end }}']),
         )
 
+    @patch("charm.TEMPLATES_FILE_MMAP_THRESHOLD", 4)
+    def test_given_config_with_templates_when_templates_file_content_changes_then_config_hash_changes(  # noqa: E501
+        self,
+    ):
+        test_templates_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(test_templates_dir.cleanup)
+        small_templates_file = os.path.join(test_templates_dir.name, "small.tmpl")
+        large_templates_file = os.path.join(test_templates_dir.name, "large.tmpl")
+        test_config = {
+            "templates": [
+                small_templates_file,
+                large_templates_file,
+                os.path.join(test_templates_dir.name, "non_existent.tmpl"),
+            ]
+        }
+        with open(small_templates_file, "w") as templates:
+            templates.write("ab")
+        with open(large_templates_file, "w") as templates:
+            templates.write("{{ define }}")
+        initial_hash = charm._config_hash(test_config)
+        self.assertEqual(initial_hash, charm._config_hash(test_config))
+
+        with open(large_templates_file, "w") as templates:
+            templates.write("{{ define changed }}")
+
+        self.assertNotEqual(initial_hash, charm._config_hash(test_config))
+
+    def test_given_config_with_templates_when_content_moves_between_templates_files_then_config_hash_changes(  # noqa: E501
+        self,
+    ):
+        test_templates_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(test_templates_dir.cleanup)
+        first_templates_file = os.path.join(test_templates_dir.name, "first.tmpl")
+        second_templates_file = os.path.join(test_templates_dir.name, "second.tmpl")
+        test_config = {"templates": [first_templates_file, second_templates_file]}
+        with open(first_templates_file, "w") as templates:
+            templates.write("ab")
+        with open(second_templates_file, "w") as templates:
+            templates.write("c")
+        initial_hash = charm._config_hash(test_config)
+
+        with open(first_templates_file, "w") as templates:
+            templates.write("a")
+        with open(second_templates_file, "w") as templates:
+            templates.write("bc")
+
+        self.assertNotEqual(initial_hash, charm._config_hash(test_config))
+
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_CACHE_FILE", new_callable=PropertyMock)
     @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
-    @patch("charm.KubernetesServicePatch", lambda charm, ports: None)
-    def test_given_alertmanager_config_in_config_dir_when_alertmanager_config_file_changed_then_config_is_pushed_to_the_data_bag(  # noqa: E501
-        self, patched_alertmanager_config_file
+    def test_given_alertmanager_config_in_config_dir_when_alertmanager_config_file_changed_then_parsed_config_is_cached_in_json_file(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_alertmanager_config_cache_file
     ):
+        charm._parse_config_cached.cache_clear()
+        self.addCleanup(charm._parse_config_cached.cache_clear)
         test_config_file = "./tests/unit/test_config/alertmanager.yml"
+        test_cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(test_cache_dir.cleanup)
+        test_cache_file = os.path.join(test_cache_dir.name, "cache.json")
         patched_alertmanager_config_file.return_value = test_config_file
-        harness = testing.Harness(AlertmanagerConfigurerOperatorCharm, config=TEST_CONFIG)
-        self.addCleanup(harness.cleanup)
-        harness.set_leader(True)
-        harness.begin()
-        with open(test_config_file, "r") as config_yaml:
-            expected_config = yaml.safe_load(config_yaml)
-        relation_id = harness.add_relation("alertmanager", "alertmanager-k8s")
-        harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+        patched_alertmanager_config_cache_file.return_value = test_cache_file
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
 
-        harness.charm.on.alertmanager_config_file_changed.emit()
+        with open(test_cache_file, "r") as cache_file:
+            cache = json.load(cache_file)
+        self.assertEqual(cache["path"], test_config_file)
+        self.assertEqual(cache["digest"], charm._config_file_digest(test_config_file))
+        self.assertEqual(cache["config"], EXPECTED_ALERTMANAGER_CONFIG)
+
+    @patch("charm._load_config_file")
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_CACHE_FILE", new_callable=PropertyMock)
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_up_to_date_json_cache_when_alertmanager_config_file_changed_then_config_from_cache_is_pushed_to_the_data_bag_without_parsing_yaml(  # noqa: E501
+        self,
+        patched_alertmanager_config_file,
+        patched_alertmanager_config_cache_file,
+        patched_load_config_file,
+    ):
+        charm._parse_config_cached.cache_clear()
+        self.addCleanup(charm._parse_config_cached.cache_clear)
+        test_config_file = "./tests/unit/test_config/alertmanager.yml"
+        test_cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(test_cache_dir.cleanup)
+        test_cache_file = os.path.join(test_cache_dir.name, "cache.json")
+        cached_config = copy.deepcopy(EXPECTED_ALERTMANAGER_CONFIG)
+        cached_config["route"]["receiver"] = "cached_receiver"
+        with open(test_cache_file, "w") as cache_file:
+            json.dump(
+                {
+                    "path": test_config_file,
+                    "digest": charm._config_file_digest(test_config_file),
+                    "config": cached_config,
+                },
+                cache_file,
+            )
+        patched_alertmanager_config_file.return_value = test_config_file
+        patched_alertmanager_config_cache_file.return_value = test_cache_file
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+
+        patched_load_config_file.assert_not_called()
+        self.assertEqual(
+            self.harness.get_relation_data(relation_id, "alertmanager-configurer-k8s")[
+                "alertmanager_config"
+            ],
+            json.dumps(cached_config),
+        )
+
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_CACHE_FILE", new_callable=PropertyMock)
+    @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
+    def test_given_config_file_content_changed_but_mtime_preserved_when_alertmanager_config_file_changed_then_new_config_is_pushed_to_the_data_bag(  # noqa: E501
+        self, patched_alertmanager_config_file, patched_alertmanager_config_cache_file
+    ):
+        charm._parse_config_cached.cache_clear()
+        self.addCleanup(charm._parse_config_cached.cache_clear)
+        test_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(test_dir.cleanup)
+        test_config_file = os.path.join(test_dir.name, "alertmanager.yml")
+        patched_alertmanager_config_file.return_value = test_config_file
+        patched_alertmanager_config_cache_file.return_value = os.path.join(
+            test_dir.name, "cache.json"
+        )
+        updated_config = copy.deepcopy(EXPECTED_ALERTMANAGER_CONFIG)
+        updated_config["route"]["receiver"] = "updated_receiver"
+        updated_config["receivers"].append({"name": "updated_receiver"})
+        with open(test_config_file, "w") as config_file:
+            yaml.safe_dump(EXPECTED_ALERTMANAGER_CONFIG, config_file)
+        relation_id = self.harness.add_relation("alertmanager", "alertmanager-k8s")
+        self.harness.add_relation_unit(relation_id, "alertmanager-k8s/0")
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
+        initial_stat = os.stat(test_config_file)
+
+        with open(test_config_file, "w") as config_file:
+            yaml.safe_dump(updated_config, config_file)
+        os.utime(test_config_file, ns=(initial_stat.st_atime_ns, initial_stat.st_mtime_ns))
+        self.harness.charm.on.alertmanager_config_file_changed.emit()
 
         self.assertEqual(
-            harness.get_relation_data(relation_id, "alertmanager-configurer-k8s")[
+            self.harness.get_relation_data(relation_id, "alertmanager-configurer-k8s")[
                 "alertmanager_config"
             ],
-            json.dumps(expected_config),
+            json.dumps(updated_config),
         )
 
     @patch(f"{ALERTMANAGER_CLASS}.ALERTMANAGER_CONFIG_FILE", new_callable=PropertyMock)
-    @patch("charm.KubernetesServicePatch", lambda charm, ports: None)
     def test_given_invalid_config_when_alertmanager_config_file_changed_then_charm_goes_to_blocked_state(  # noqa: E501
         self, patched_alertmanager_config_file
     ):
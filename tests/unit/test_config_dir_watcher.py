@@ -2,63 +2,286 @@
 # Copyright 2023 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import os
+import struct
+import subprocess
+import tempfile
 import unittest
+from typing import Dict
 from unittest.mock import patch
 
 from ops import testing
 
+from _watchdog_child import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_DELETE,
+    IN_MOVED_TO,
+    IN_Q_OVERFLOW,
+    Handler,
+    dispatch,
+    inotify_init,
+    read_inotify_events,
+    watch_directory_tree,
+)
 from charm import AlertmanagerConfigurerOperatorCharm
 from config_dir_watcher import AlertmanagerConfigDirWatcher
 
+TEST_WATCH_DIR = "/whatever/watch/dir"
+
 
 class TestConfigDirWatcher(unittest.TestCase):
+    @classmethod
     @patch("charm.KubernetesServicePatch", lambda charm, ports: None)
-    def setUp(self):
-        self.harness = testing.Harness(AlertmanagerConfigurerOperatorCharm)
-        self.harness.begin()
-
-    @patch("pathlib.Path.exists")
-    @patch("subprocess.Popen")
-    @patch("config_dir_watcher.LOG_FILE_PATH")
-    def test_given_config_dir_watcher_and_juju_exec_exists_when_start_watchdog_then_correct_subprocess_is_started(
-        self, _, patched_popen, patched_path_exists
+    def setUpClass(cls):
+        # The tests only read the unit name and charm dir, so the Harness can be shared
+        cls.harness = testing.Harness(AlertmanagerConfigurerOperatorCharm)
+        cls.addClassCleanup(cls.harness.cleanup)
+        cls.harness.begin()
+        cls.unit_name = cls.harness.charm.unit.name
+        cls.charm_dir = str(cls.harness.charm.charm_dir)
+        # The watcher keeps no state between start_watchdog() calls
+        cls.watchdog = AlertmanagerConfigDirWatcher(cls.harness.charm, TEST_WATCH_DIR)
+
+    def test_given_config_dir_watcher_when_start_watchdog_then_correct_subprocess_is_started(
+        self,
+    ):
+        # juju-exec replaces juju-run on recent Juju versions
+        for juju_exec_exists, juju_bin in (
+            (True, "/usr/bin/juju-exec"),
+            (False, "/usr/bin/juju-run"),
+        ):
+            with self.subTest(juju_bin=juju_bin), patch.dict(
+                os.environ, {"JUJU_CONTEXT_ID": "whatever-context-id"}
+            ), patch("config_dir_watcher.LOG_FILE_PATH", os.devnull), patch(
+                "os.path.exists", return_value=juju_exec_exists
+            ), patch(
+                "os.posix_spawn", return_value=1234
+            ) as patched_posix_spawn:
+                expected_env = {
+                    key: value for key, value in os.environ.items() if key != "JUJU_CONTEXT_ID"
+                }
+
+                self.watchdog.start_watchdog()
+
+                patched_posix_spawn.assert_called_once_with(
+                    "/usr/bin/python3",
+                    [
+                        "/usr/bin/python3",
+                        "src/_watchdog_child.py",
+                        TEST_WATCH_DIR,
+                        juju_bin,
+                        self.unit_name,
+                        self.charm_dir,
+                    ],
+                    expected_env,
+                    file_actions=[
+                        (
+                            os.POSIX_SPAWN_OPEN,
+                            1,
+                            os.devnull,
+                            os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                            0o644,
+                        ),
+                        (os.POSIX_SPAWN_DUP2, 1, 2),
+                    ],
+                )
+
+    @patch("_watchdog_child.threading.Thread")
+    def test_given_handler_when_start_then_dispatch_worker_is_started_in_daemon_thread(
+        self, patched_thread
+    ):
+        handler = Handler("/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir")
+
+        handler.start()
+
+        patched_thread.assert_called_once_with(target=handler._dispatch_worker, daemon=True)
+        patched_thread.return_value.start.assert_called_once_with()
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_burst_of_file_events_when_handler_called_then_juju_event_is_dispatched_once(
+        self, patched_dispatch
     ):
-        test_watch_dir = "/whatever/watch/dir"
-        patched_path_exists.return_value = True
-        watchdog = AlertmanagerConfigDirWatcher(self.harness.charm, test_watch_dir)
-
-        watchdog.start_watchdog()
-
-        call_list = patched_popen.call_args_list
-        patched_popen.assert_called_once()
-        assert call_list[0].kwargs["args"] == [
-            "/usr/bin/python3",
-            "src/config_dir_watcher.py",
-            test_watch_dir,
-            "/usr/bin/juju-exec",
-            self.harness.charm.unit.name,
-            self.harness.charm.charm_dir,
-        ]
-
-    @patch("pathlib.Path.exists")
-    @patch("subprocess.Popen")
-    @patch("config_dir_watcher.LOG_FILE_PATH")
-    def test_given_config_dir_watcher_and_juju_exec_does_not_exist_when_start_watchdog_then_correct_subprocess_is_started(
-        self, _, patched_popen, patched_path_exists
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        for _ in range(3):
+            handler.handle(IN_CLOSE_WRITE, "alertmanager.yml")
+        self.assertTrue(handler.dispatch_pending(block=False))
+        self.assertFalse(handler.dispatch_pending(block=False))
+
+        patched_dispatch.assert_called_once_with(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir"
+        )
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_file_events_after_previous_dispatch_when_handler_called_then_juju_event_is_dispatched_again(  # noqa: E501
+        self, patched_dispatch
     ):
-        test_watch_dir = "/whatever/watch/dir"
-        patched_path_exists.return_value = False
-        watchdog = AlertmanagerConfigDirWatcher(self.harness.charm, test_watch_dir)
-
-        watchdog.start_watchdog()
-
-        call_list = patched_popen.call_args_list
-        patched_popen.assert_called_once()
-        assert call_list[0].kwargs["args"] == [
-            "/usr/bin/python3",
-            "src/config_dir_watcher.py",
-            test_watch_dir,
-            "/usr/bin/juju-run",
-            self.harness.charm.unit.name,
-            self.harness.charm.charm_dir,
-        ]
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_CLOSE_WRITE, "alertmanager.yml")
+        handler.dispatch_pending(block=False)
+        handler.handle(IN_CLOSE_WRITE, "alertmanager.yml")
+        handler.dispatch_pending(block=False)
+
+        self.assertEqual(patched_dispatch.call_count, 2)
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_hidden_or_temp_file_when_handler_called_then_juju_event_is_not_dispatched(
+        self, patched_dispatch
+    ):
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_CLOSE_WRITE, ".alertmanager.yml.swp")
+        handler.handle(IN_MOVED_TO, "alertmanager.yml.bak")
+        handler.handle(IN_CLOSE_WRITE, "alertmanager.yml~")
+        handler.handle(IN_CREATE, "..2023_01_01_00_00_00.000000000")
+        handler.handle(IN_CREATE, "..data_tmp")
+        handler.dispatch_pending(block=False)
+
+        patched_dispatch.assert_not_called()
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_templates_file_edited_in_place_when_handler_called_then_juju_event_is_dispatched(  # noqa: E501
+        self, patched_dispatch
+    ):
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_CLOSE_WRITE, "alertmanager.tmpl")
+        handler.dispatch_pending(block=False)
+
+        patched_dispatch.assert_called_once()
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_inotify_event_queue_overflow_when_handler_called_then_juju_event_is_dispatched(  # noqa: E501
+        self, patched_dispatch
+    ):
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_Q_OVERFLOW, "")
+        handler.dispatch_pending(block=False)
+
+        patched_dispatch.assert_called_once()
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_temp_file_renamed_to_alertmanager_config_when_handler_called_then_juju_event_is_dispatched(  # noqa: E501
+        self, patched_dispatch
+    ):
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_MOVED_TO, "alertmanager.yml")
+        handler.dispatch_pending(block=False)
+
+        patched_dispatch.assert_called_once()
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_inotify_events_when_handler_called_then_only_content_change_events_are_handled(  # noqa: E501
+        self, patched_dispatch
+    ):
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_DELETE, "alertmanager.yml")
+        handler.dispatch_pending(block=False)
+        patched_dispatch.assert_not_called()
+
+        handler.handle(IN_CLOSE_WRITE, "alertmanager.yml")
+        handler.dispatch_pending(block=False)
+        patched_dispatch.assert_called_once()
+
+    @patch("_watchdog_child.dispatch")
+    def test_given_configmap_data_symlink_swapped_when_handler_called_then_juju_event_is_dispatched_once(  # noqa: E501
+        self, patched_dispatch
+    ):
+        handler = Handler(
+            "/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir", debounce_seconds=0
+        )
+
+        handler.handle(IN_CREATE, "..2023_01_01_00_00_00.000000000")
+        handler.handle(IN_CREATE, "..data_tmp")
+        handler.handle(IN_MOVED_TO, "..data")
+        handler.handle(IN_DELETE, "..2022_12_31_00_00_00.000000000")
+        handler.dispatch_pending(block=False)
+
+        patched_dispatch.assert_called_once()
+
+    def test_given_raw_inotify_events_when_read_inotify_events_then_events_are_parsed(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        name = b"alertmanager.yml".ljust(32, b"\0")
+        raw_events = struct.pack("iIII", 1, IN_CLOSE_WRITE, 0, len(name)) + name
+        raw_events += struct.pack("iIII", 1, IN_CREATE, 0, 0)
+        os.write(write_fd, raw_events)
+        os.close(write_fd)
+
+        events = list(read_inotify_events(read_fd))
+
+        self.assertEqual(events, [(1, IN_CLOSE_WRITE, "alertmanager.yml"), (1, IN_CREATE, "")])
+
+    def test_given_config_dir_with_subdirectories_when_watch_directory_tree_then_non_hidden_subdirectories_are_watched(  # noqa: E501
+        self,
+    ):
+        with tempfile.TemporaryDirectory() as config_dir:
+            templates_dir = os.path.join(config_dir, "templates")
+            os.makedirs(os.path.join(templates_dir, "slack"))
+            os.mkdir(os.path.join(config_dir, "..2022_12_31_00_00_00.000000000"))
+            fd = inotify_init()
+            self.addCleanup(os.close, fd)
+            watches: Dict[int, str] = {}
+
+            watch_directory_tree(fd, config_dir, watches)
+
+            self.assertEqual(
+                sorted(watches.values()),
+                [config_dir, templates_dir, os.path.join(templates_dir, "slack")],
+            )
+
+    def test_given_watched_subdirectory_when_template_is_written_then_event_concerns_the_subdirectory(  # noqa: E501
+        self,
+    ):
+        with tempfile.TemporaryDirectory() as config_dir:
+            templates_dir = os.path.join(config_dir, "templates")
+            os.mkdir(templates_dir)
+            fd = inotify_init()
+            self.addCleanup(os.close, fd)
+            watches: Dict[int, str] = {}
+            watch_directory_tree(fd, config_dir, watches)
+
+            with open(os.path.join(templates_dir, "slack.tmpl"), "w") as template:
+                template.write('{{ define "slack" }}{{ end }}')
+            wd, mask, name = next(read_inotify_events(fd))
+
+            self.assertEqual(watches[wd], templates_dir)
+            self.assertTrue(mask & IN_CREATE)
+            self.assertEqual(name, "slack.tmpl")
+
+    @patch("subprocess.run")
+    def test_given_juju_exec_times_out_when_dispatch_then_error_is_not_raised(self, patched_run):
+        patched_run.side_effect = subprocess.TimeoutExpired(cmd="/usr/bin/juju-exec", timeout=30)
+
+        dispatch("/usr/bin/juju-exec", "whatever/0", "/whatever/charm/dir")
+
+        patched_run.assert_called_once_with(
+            [
+                "/usr/bin/juju-exec",
+                "-u",
+                "whatever/0",
+                "JUJU_DISPATCH_PATH=hooks/alertmanager_config_file_changed "
+                "/whatever/charm/dir/dispatch",
+            ],
+            stdout=subprocess.DEVNULL,
+            timeout=30,
+        )